@@ -1,24 +1,28 @@
-from fastapi import FastAPI, Request, BackgroundTasks, Query, Body
+from fastapi import FastAPI, Request, BackgroundTasks, Query
 from fastapi.openapi.docs import get_swagger_ui_html
-from fastapi.responses import RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import RedirectResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import Union
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+import asyncio
 import logging
-import json
+from concurrent.futures import ThreadPoolExecutor
+import os
+import orjson
 from telegram_bot import TelegramBot
 from weather import WeatherService
 from euroleague import EuroleagueService
 from places_api import PlacesApiService
-from dialogflow_handler import DialogflowHandler
+from dialogflow_handler import DialogflowHandler, queryResultToDict, UNHANDLED_TEXT
 from telegram_voice import TelegramVoiceChannel
 from google.cloud import dialogflow_v2 as dialogflow
-from google.protobuf.json_format import MessageToDict
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+# Handlers and levels are configured once in main.py.
+logger = logging.getLogger(__name__)
 
 # --- Pydantic Response Models ---
 class WeatherResponse(BaseModel):
@@ -45,9 +49,22 @@ class PlacesResponse(BaseModel):
 class SimpleResult(BaseModel):
     result: Union[str, dict]
 
-def loadConfig() -> dict:
-    with open("config.json", "r") as configFile:
-        return json.load(configFile)
+# Keys that may be supplied through the environment instead of (or on top of) config.json.
+CONFIG_ENV_KEYS = (
+    "TELEGRAM_TOKEN", "OPENWEATHERMAP_API_KEY", "GOOGLE_PLACES_API_KEY", "DIALOGFLOW_PROJECT_ID",
+    "S3_BUCKET_NAME", "S3_REGION", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_REGION",
+    "VOICE_WORKERS", "VOICE_QUEUE_SIZE", "IO_WORKERS", "TRANSCRIBE_CONCURRENCY"
+)
+
+@lru_cache(maxsize=1)
+def loadConfig() -> MappingProxyType:
+    # Read-only view: the config is loaded once and shared by every service and the voice workers.
+    try:
+        config = orjson.loads(Path("config.json").read_bytes())
+    except FileNotFoundError:
+        config = {}
+    config.update((key, os.environ[key]) for key in CONFIG_ENV_KEYS if os.environ.get(key))
+    return MappingProxyType(config)
 
 CONFIG = loadConfig()
 TELEGRAM_TOKEN = CONFIG.get("TELEGRAM_TOKEN")
@@ -55,13 +72,33 @@ OPENWEATHERMAP_API_KEY = CONFIG.get("OPENWEATHERMAP_API_KEY")
 GOOGLE_PLACES_API_KEY = CONFIG.get("GOOGLE_PLACES_API_KEY")
 S3_BUCKET_NAME = CONFIG.get("S3_BUCKET_NAME")
 PROJECT_ID = CONFIG.get("DIALOGFLOW_PROJECT_ID", "your-dialogflow-project-id")
+TRANSCRIBE_CONCURRENCY = int(CONFIG.get("TRANSCRIBE_CONCURRENCY", 5))
+# Voice messages share no files, S3 keys or job names, so one worker per Transcribe slot by default;
+# more workers than slots would only wait on the slots.
+VOICE_WORKERS = int(CONFIG.get("VOICE_WORKERS", TRANSCRIBE_CONCURRENCY))
+VOICE_QUEUE_SIZE = int(CONFIG.get("VOICE_QUEUE_SIZE", 100))
+IO_WORKERS = int(CONFIG.get("IO_WORKERS", 32))
 
 TELEGRAM_BOT = TelegramBot(TELEGRAM_TOKEN)
 WEATHER_SERVICE = WeatherService(OPENWEATHERMAP_API_KEY)
 EUROLEAGUE_SERVICE = EuroleagueService()
 PLACES_API_SERVICE = PlacesApiService(GOOGLE_PLACES_API_KEY)
 DIALOGFLOW_HANDLER = DialogflowHandler(TELEGRAM_BOT, WEATHER_SERVICE, EUROLEAGUE_SERVICE, PLACES_API_SERVICE)
-TELEGRAM_VOICE_CHANNEL = TelegramVoiceChannel(TELEGRAM_TOKEN, S3_BUCKET_NAME)
+TELEGRAM_VOICE_CHANNEL = TelegramVoiceChannel(TELEGRAM_TOKEN, S3_BUCKET_NAME, TRANSCRIBE_CONCURRENCY)
+
+CALLBACK_REPLIES = {
+    "/weather": "Please provide the city name for weather details.",
+    "/euroleague": "Please provide the team name for Euroleague details.",
+    "/places": "Please provide the type of place and city for recommendations.",
+}
+KNOWN_CALLBACKS = frozenset(CALLBACK_REPLIES)
+VOICE_ACK_TEXT = "We are processing your request, please wait..."
+VOICE_BUSY_TEXT = "We are busy right now, please try again in a moment."
+STATUS_OK_BYTES = orjson.dumps({"status": "ok"})
+LAST_GAME_QUERIES = frozenset({"last", "latest", "previous", "past"})
+NEXT_GAME_QUERIES = frozenset({"next", "upcoming", "following"})
+SUMMARY_QUERIES = frozenset({"summary"})
+DIALOGFLOW_WARMUP_TIMEOUT = 10
 
 app = FastAPI(
     title="Euroleague Traveler Bot API",
@@ -72,70 +109,164 @@ app = FastAPI(
         "Built with FastAPI. Explore, test, and integrate!"
     ),
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
+# Only bodies over 1 KB (place lists, reply markups) are worth compressing; the usual {"status": "ok"} goes out as is.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+async def voiceWorker(queue: asyncio.Queue):
+    # Drains queued voice updates so transcription never runs inside the webhook request.
+    while True:
+        requestJson = await queue.get()
+        try:
+            await TELEGRAM_VOICE_CHANNEL.processWebhook(requestJson, DIALOGFLOW_HANDLER, CONFIG, PROJECT_ID)
+        except Exception:
+            logger.exception("Voice job failed")
+        finally:
+            queue.task_done()
+
+@app.on_event("startup")
+async def startIoExecutor():
+    # Fulfillment and voice steps run blocking HTTP calls via run_in_executor/to_thread. The default pool is
+    # sized from the CPU count (6 threads on 2 vCPUs), which would cap concurrent chats far below what I/O allows.
+    app.state.ioExecutor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+    asyncio.get_running_loop().set_default_executor(app.state.ioExecutor)
+
+@app.on_event("startup")
+async def startVoiceWorkers():
+    app.state.voiceQueue = asyncio.Queue(maxsize=VOICE_QUEUE_SIZE)
+    app.state.voiceWorkers = [asyncio.create_task(voiceWorker(app.state.voiceQueue)) for _ in range(VOICE_WORKERS)]
+    logger.info("Started %s voice worker(s).", VOICE_WORKERS)
+
+@app.on_event("shutdown")
+async def stopVoiceWorkers():
+    for worker in app.state.voiceWorkers:
+        worker.cancel()
+    await asyncio.gather(*app.state.voiceWorkers, return_exceptions=True)
+
+@app.on_event("shutdown")
+async def closeHttpClients():
+    await TELEGRAM_BOT.close()
+    await TELEGRAM_VOICE_CHANNEL.close()
 
 @app.get("/", include_in_schema=False)
 def root_redirect():
     return RedirectResponse(url="/docs")
 
-def detectIntent(projectId, sessionId, text, languageCode='en'):
-    sessionClient = dialogflow.SessionsClient()
-    session = sessionClient.session_path(projectId, sessionId)
+@lru_cache(maxsize=1)
+def getSessionsClient():
+    # One async client per process so the gRPC channel and auth token stay warm between requests.
+    # Built on first use, inside the running event loop that owns its channel.
+    return dialogflow.SessionsAsyncClient()
+
+@lru_cache(maxsize=8192)
+def sessionPath(projectId: str, sessionId: str) -> str:
+    # Same format as SessionsClient.session_path, without going through its path template per message.
+    return f"projects/{projectId}/agent/sessions/{sessionId}"
+
+async def detectIntent(projectId, sessionId, text, languageCode='en'):
+    sessionClient = getSessionsClient()
+    session = sessionPath(projectId, sessionId)
     if text.strip() == "/start":
-        logging.info("Using event input 'Welcome' for /start command")
+        logger.info("Using event input 'Welcome' for /start command")
         eventInput = dialogflow.EventInput(name="Welcome", language_code=languageCode)
         queryInput = dialogflow.QueryInput(event=eventInput)
     else:
         textInput = dialogflow.TextInput(text=text, language_code=languageCode)
         queryInput = dialogflow.QueryInput(text=textInput)
-    response = sessionClient.detect_intent(request={"session": session, "query_input": queryInput})
-    response_dict = MessageToDict(response._pb, preserving_proto_field_name=True)
-    query_result = response_dict.get("query_result", {})
-    return {
-        "intent": {"displayName": query_result.get("intent", {}).get("display_name", "")},
-        "parameters": query_result.get("parameters", {}),
-        "fulfillmentText": query_result.get("fulfillment_text", ""),
-        "fulfillmentMessages": query_result.get("fulfillment_messages", [])
-    }
+    response = await sessionClient.detect_intent(request={"session": session, "query_input": queryInput})
+    return queryResultToDict(response._pb.query_result)
+
+async def warmUpDialogflow():
+    # Build the client and connect its gRPC channel (DNS, TLS) before the first real message needs them.
+    # No query is sent: a detectIntent would be billed, open a session and could trigger webhook fulfillment.
+    try:
+        channel = getSessionsClient().transport.grpc_channel
+        await asyncio.wait_for(channel.channel_ready(), DIALOGFLOW_WARMUP_TIMEOUT)
+        logger.info("Dialogflow client warmed up.")
+    except Exception:
+        logger.exception("Dialogflow warm-up failed")
+
+@app.on_event("startup")
+async def startDialogflowWarmUp():
+    app.state.dialogflowWarmUp = asyncio.create_task(warmUpDialogflow())
 
-def processCallbackQuery(requestJson: dict) -> dict:
+class UpdateType(Enum):
+    CALLBACK = "callback"
+    DIALOGFLOW = "dialogflow"
+    VOICE = "voice"
+    TEXT = "text"
+    NONE = "none"
+
+# Checked in order; supporting a new update kind (e.g. "photo") is one more row.
+REQUEST_UPDATE_KEYS = (("callback_query", UpdateType.CALLBACK), ("queryResult", UpdateType.DIALOGFLOW))
+MESSAGE_UPDATE_KEYS = (("voice", UpdateType.VOICE), ("audio", UpdateType.VOICE), ("text", UpdateType.TEXT))
+
+def classifyUpdate(requestJson: dict, message: dict) -> UpdateType:
+    # Tag the incoming update once so the webhook dispatches on a single value.
+    for key, updateType in REQUEST_UPDATE_KEYS:
+        if key in requestJson:
+            return updateType
+    for key, updateType in MESSAGE_UPDATE_KEYS:
+        if key in message:
+            return updateType
+    return UpdateType.NONE
+
+async def processCallbackQuery(requestJson: dict) -> dict:
     callback = requestJson["callback_query"]
-    chatId = callback["message"]["chat"]["id"]
     data = callback.get("data", "")
-    logging.info(f"Processing callback query with data: {data}")
-    if data == "/weather":
-        TELEGRAM_BOT.sendMessage(chatId, "Please provide the city name for weather details.")
-    elif data == "/euroleague":
-        TELEGRAM_BOT.sendMessage(chatId, "Please provide the team name for Euroleague details.")
-    elif data == "/places":
-        TELEGRAM_BOT.sendMessage(chatId, "Please provide the type of place and city for recommendations.")
-    else:
+    if data not in KNOWN_CALLBACKS:
+        # Stale buttons and other bots' callbacks end here without touching the message.
         return {"status": "no content"}
+    chatId = callback["message"]["chat"]["id"]
+    logger.info("Processing callback query with data: %s", data)
+    await TELEGRAM_BOT.sendMessage(chatId, CALLBACK_REPLIES[data])
     return {"status": "ok"}
 
-def processDialogflowRequest(requestJson: dict) -> dict:
-    logging.info("Processing Dialogflow webhook request.")
+async def processDialogflowRequest(requestJson: dict) -> bytes:
+    # Returns the serialized fulfillment; it is encoded on the worker thread, not the event loop.
+    logger.info("Processing Dialogflow webhook request.")
     queryResult = requestJson.get("queryResult", {})
     if not queryResult or not queryResult.get("intent", {}).get("display_name"):
-        logging.info("Empty queryResult or missing intent. Ignoring request.")
-        return {"status": "ok"}
-    return DIALOGFLOW_HANDLER.processRequest(requestJson)
+        logger.info("Empty queryResult or missing intent. Ignoring request.")
+        return STATUS_OK_BYTES
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, DIALOGFLOW_HANDLER.processRequestBytes, requestJson)
 
-def processTelegramText(message: dict, chatId) -> dict:
+async def processTelegramText(message: dict, chatId) -> dict:
     text = message.get("text", "")
-    queryResult = detectIntent(PROJECT_ID, str(chatId), text)
-    logging.info("detectIntent result: %s", json.dumps(queryResult, indent=2))
-    responsePayload = DIALOGFLOW_HANDLER.processRequest({"queryResult": queryResult})
-    replyMarkup = None
-    for msg in responsePayload.get("fulfillmentMessages", []):
-        if "payload" in msg and "telegram" in msg["payload"]:
-            replyMarkup = msg["payload"]["telegram"].get("reply_markup")
-            break
-    fulfillmentText = responsePayload.get("fulfillmentText", "I'm sorry, I didn't understand that request.")
-    TELEGRAM_BOT.sendMessage(chatId, fulfillmentText, reply_markup=replyMarkup)
+    queryResult = await detectIntent(PROJECT_ID, str(chatId), text)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("detectIntent result: %s", orjson.dumps(queryResult, option=orjson.OPT_INDENT_2).decode())
+    # Fulfillment calls the blocking weather/Euroleague/places services; keep them off the event loop
+    # so concurrent chats overlap their round-trips instead of queueing behind each other.
+    loop = asyncio.get_running_loop()
+    responsePayload = await loop.run_in_executor(None, DIALOGFLOW_HANDLER.processRequest, {"queryResult": queryResult})
+    replyMarkup = next(
+        (msg["payload"]["telegram"].get("reply_markup")
+         for msg in responsePayload.get("fulfillmentMessages", ())
+         if isinstance(msg.get("payload"), dict) and "telegram" in msg["payload"]),
+        None
+    )
+    fulfillmentText = responsePayload.get("fulfillmentText", UNHANDLED_TEXT)
+    await TELEGRAM_BOT.sendMessage(chatId, fulfillmentText, reply_markup=replyMarkup)
     return {"status": "ok"}
 
+async def runLogged(handler, *args) -> None:
+    # Background work has no response to carry an error, so it is logged here instead.
+    try:
+        await handler(*args)
+    except Exception:
+        logger.exception("Error processing webhook in background")
+
+async def ackThenRun(background_tasks: BackgroundTasks, handler, *args) -> dict:
+    # Telegram only needs the 200; the reply goes out via sendMessage after the response is sent,
+    # so slow Dialogflow/API round-trips never push the webhook past Telegram's delivery window.
+    if background_tasks is None:
+        return await handler(*args)
+    background_tasks.add_task(runLogged, handler, *args)
+    return {"status": "ok"}
 
 # Example payload for /amit-bot endpoint (used in Swagger UI)
 amit_bot_example = {
@@ -150,103 +281,114 @@ amit_bot_example = {
     summary="Webhook for Telegram/ Dialogflow requests",
     description="Main endpoint for receiving Telegram updates and Dialogflow requests.",
     response_model=dict,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"example": amit_bot_example}},
+        }
+    },
 )
 async def amitBotWebhook(
-    payload: dict = Body(..., example=amit_bot_example),
+    request: Request,
     background_tasks: BackgroundTasks = None
 ):
     try:
-        logging.info("Received a new webhook request.")
-        requestJson = payload
-        logging.info(f"Incoming JSON: {json.dumps(requestJson, indent=2)}")
-        if "callback_query" in requestJson:
-            return processCallbackQuery(requestJson)
-        if "queryResult" in requestJson:
-            return processDialogflowRequest(requestJson)
-        message = requestJson.get("message", {})
-        chat = message.get("chat", {})
-        chatId = chat.get("id")
-        if "voice" in message or "audio" in message:
-            return handleVoiceMessage(message, chatId, requestJson, background_tasks)
-        elif "text" in message:
-            return handleTextMessage(message, chatId)
-        logging.info("No text or voice in message.")
-        return {"status": "no content"}
+        logger.info("Received a new webhook request.")
+        body = await request.body()
+        requestJson = orjson.loads(body)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Incoming JSON: %s", orjson.dumps(requestJson, option=orjson.OPT_INDENT_2).decode())
+        message = requestJson.get("message") or {}
+        updateType = classifyUpdate(requestJson, message)
+        if updateType is UpdateType.CALLBACK:
+            return ORJSONResponse(await ackThenRun(background_tasks, processCallbackQuery, requestJson))
+        if updateType is UpdateType.DIALOGFLOW:
+            # Dialogflow reads the fulfillment from this response, so it cannot be deferred.
+            return Response(content=await processDialogflowRequest(requestJson), media_type="application/json")
+        if updateType is UpdateType.NONE:
+            logger.info("No text or voice in message.")
+            return ORJSONResponse({"status": "no content"})
+        chatId = message.get("chat", {}).get("id")
+        if updateType is UpdateType.VOICE:
+            return ORJSONResponse(handleVoiceMessage(message, chatId, requestJson))
+        return ORJSONResponse(await ackThenRun(background_tasks, handleTextMessage, message, chatId))
     except Exception as e:
-        logging.exception("Error processing webhook")
-        return {"error": str(e)}
-
-def handleVoiceMessage(message: dict, chatId, requestJson, backgroundTasks):
-    logging.info("Detected voice message. Sending acknowledgment.")
-    TELEGRAM_BOT.sendMessage(chatId, "We are processing your request, please wait...")
-    backgroundTasks.add_task(
-        TELEGRAM_VOICE_CHANNEL.processWebhook,
-        requestJson, DIALOGFLOW_HANDLER, CONFIG, PROJECT_ID
-    )
-    return {"status": "ok"}
+        logger.exception("Error processing webhook")
+        return ORJSONResponse({"error": str(e)})
+
+def webhookReply(chatId, text: str) -> dict:
+    # Telegram runs a method returned in the webhook response body, saving a separate sendMessage round-trip.
+    return {"method": "sendMessage", "chat_id": chatId, "text": text}
+
+def handleVoiceMessage(message: dict, chatId, requestJson):
+    # Only enqueues, so it runs inline on the event loop; the workers do the awaiting.
+    try:
+        app.state.voiceQueue.put_nowait(requestJson)
+    except asyncio.QueueFull:
+        logger.warning("Voice queue is full. Rejecting voice message.")
+        return webhookReply(chatId, VOICE_BUSY_TEXT)
+    logger.info("Queued voice message. Acknowledging in the webhook response.")
+    return webhookReply(chatId, VOICE_ACK_TEXT)
 
-def handleTextMessage(message: dict, chatId):
-    return processTelegramText(message, chatId)
+async def handleTextMessage(message: dict, chatId):
+    return await processTelegramText(message, chatId)
 
 @app.get(
     "/test/weather",
     summary="Weather Service Test",
     description="Test the weather service for a given city and forecast type.",
-    response_model=WeatherResponse,
+    responses={200: {"model": WeatherResponse}},
     tags=["Weather"]
 )
-def testWeather(
+async def testWeather(
     city: str = Query(..., description="City name for testing", example="Tel Aviv"),
     forecast: str = Query(None, description="Forecast type (e.g., hourly, tomorrow, in 3 days)", example="in 3 days")
 ):
-    result = WEATHER_SERVICE.getWeatherData(city, forecast)
-    return WeatherResponse(city=city, forecast=forecast, result=result)
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, WEATHER_SERVICE.getWeatherData, city, forecast)
+    return ORJSONResponse({"city": city, "forecast": forecast, "result": result})
 
 @app.get(
     "/test/euroleague",
     summary="Euroleague Service Test",
-    description="Test the Euroleague service for a given team, season, and query type (last/next/all games).",
-    response_model=EuroleagueResponse,
+    description="Test the Euroleague service for a given team, season, and query type (last/next/summary/all games).",
+    responses={200: {"model": EuroleagueResponse}},
     tags=["Euroleague"]
 )
-def testEuroleague(
+async def testEuroleague(
     team: str = Query(..., description="Team name", example="Barcelona"),
     season: str = Query("E2024", description="Season code (default: E2024)", example="E2024"),
-    query: str = Query("last", description="Query type: last/next/other", example="last")
+    query: str = Query("last", description="Query type: last/next/summary/other", example="last")
 ):
     queryLower = query.lower()
-    if queryLower in ["last", "latest", "previous", "past"]:
-        result = EUROLEAGUE_SERVICE.getLastGameResult(season, team)
-    elif queryLower in ["next", "upcoming", "following"]:
-        result = EUROLEAGUE_SERVICE.getNextGameFormatted(season, team)
+    loop = asyncio.get_running_loop()
+    if queryLower in SUMMARY_QUERIES:
+        # Last and next game come from different feeds; fetch them side by side on the executor.
+        lastGame, nextGame = await asyncio.gather(
+            loop.run_in_executor(None, EUROLEAGUE_SERVICE.getLastGameResult, season, team),
+            loop.run_in_executor(None, EUROLEAGUE_SERVICE.getNextGameFormatted, season, team)
+        )
+        return ORJSONResponse({"team": team, "season": season, "query": query, "result": lastGame + "\n\n" + nextGame})
+    if queryLower in LAST_GAME_QUERIES:
+        fetch = EUROLEAGUE_SERVICE.getLastGameResult
+    elif queryLower in NEXT_GAME_QUERIES:
+        fetch = EUROLEAGUE_SERVICE.getNextGameFormatted
     else:
-        result = EUROLEAGUE_SERVICE.getSeasonResults(season, team)
-    return EuroleagueResponse(team=team, season=season, query=query, result=result)
+        fetch = EUROLEAGUE_SERVICE.getSeasonResults
+    result = await loop.run_in_executor(None, fetch, season, team)
+    return ORJSONResponse({"team": team, "season": season, "query": query, "result": result})
 
 @app.get(
     "/test/places",
     summary="Places Service Test",
     description="Test the places service for a given city and type of place. Returns a list of recommended places.",
-    response_model=PlacesResponse,
+    responses={200: {"model": PlacesResponse}},
     tags=["Places"]
 )
-def testPlaces(
+async def testPlaces(
     city: str = Query(..., description="City name for testing", example="Paris"),
     place_type: str = Query(..., description="Type of place (e.g., restaurants, parks, museums)", example="restaurants")
 ):
-    places_result = PLACES_API_SERVICE.getPlaces(place_type, city)
-    # Parse the string result into structured data for Swagger (best effort)
-    items = []
-    if isinstance(places_result, str):
-        lines = places_result.split("\n")[1:]
-        for line in lines:
-            if not line.strip():
-                continue
-            parts = line.split(" - ")
-            if len(parts) == 2:
-                name = parts[0].strip()
-                rest = parts[1]
-                addr, _, rating_part = rest.partition(" (Rating: ")
-                rating = rating_part.replace(")", "").strip() if rating_part else "N/A"
-                items.append(PlaceItem(name=name, address=addr.strip(), rating=rating))
-    return PlacesResponse(city=city, place_type=place_type, results=items)
+    loop = asyncio.get_running_loop()
+    _, items = await loop.run_in_executor(None, PLACES_API_SERVICE.getPlacesStructured, place_type, city)
+    return ORJSONResponse({"city": city, "place_type": place_type, "results": items})
@@ -1,11 +1,133 @@
 import logging
+import orjson
 import re
+import threading
+import time
+from collections import OrderedDict
+from google.protobuf.json_format import MessageToDict
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+logger = logging.getLogger(__name__)
+
+def valueToPy(value):
+    # Same output as MessageToDict for a protobuf Value: numbers come back as float, null as None.
+    kind = value.WhichOneof("kind")
+    if kind == "string_value":
+        return value.string_value
+    if kind == "number_value":
+        return value.number_value
+    if kind == "bool_value":
+        return value.bool_value
+    if kind == "struct_value":
+        return structToDict(value.struct_value)
+    if kind == "list_value":
+        return [valueToPy(item) for item in value.list_value.values]
+    return None
+
+def structToDict(struct) -> dict:
+    return {key: valueToPy(value) for key, value in struct.fields.items()}
+
+def queryResultToDict(queryResult) -> dict:
+    # Pull the four fields the bot uses straight off a QueryResult protobuf instead of converting the whole
+    # response. The parameters Struct is flattened once here so the intent handlers only do dict lookups;
+    # the fulfillment messages still go through MessageToDict.
+    return {
+        "intent": {"displayName": queryResult.intent.display_name},
+        "parameters": structToDict(queryResult.parameters),
+        "fulfillmentText": queryResult.fulfillment_text,
+        "fulfillmentMessages": [MessageToDict(msg, preserving_proto_field_name=True) for msg in queryResult.fulfillment_messages]
+    }
+
+LAST_GAME_SYNONYMS = frozenset(("last", "latest", "previous", "most recent", "past", "final"))
+NEXT_GAME_SYNONYMS = frozenset(("next", "upcoming", "coming", "following", "future", "subsequent"))
+WEATHER_STOPWORDS = frozenset((
+    "weather", "what", "is", "the", "will", "be", "like", "forecast", "in", "at", "for",
+    "on", "of", "tell", "me", "please", "today", "tomorrow"
+))
+
+# Compiled once at import. Synonyms only match as whole words, so "pasta" is not "past" and "becoming" is not "coming".
+YEAR_RE = re.compile(r'(20\d{2})')
+CITY_RE = re.compile(r'(?:\bin|\bat|\bfor)\s+([A-Za-z][A-Za-z\s]*?)[?.!]*\s*$', re.IGNORECASE)
+WORD_RE = re.compile(r'\b[A-Za-z]+\b')
+LAST_GAME_RE = re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, sorted(LAST_GAME_SYNONYMS))))
+NEXT_GAME_RE = re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, sorted(NEXT_GAME_SYNONYMS))))
+UPCOMING_SEASON_RE = re.compile("next|upcoming", re.IGNORECASE)
+TOMORROW_RE = re.compile("tomorrow", re.IGNORECASE)
+FUTURE_RE = re.compile(r"in \d+ days|in (?:one|two|three) day|next week", re.IGNORECASE)
+
+def guessCityName(queryText: str):
+    # A city after 'in', 'at' or 'for' (e.g. 'weather in Hogwarts'); otherwise the last word that is not a stopword.
+    match = CITY_RE.search(queryText)
+    if match is not None:
+        return match.group(1).strip()
+    words = [w for w in WORD_RE.findall(queryText) if w.lower() not in WEATHER_STOPWORDS]
+    return words[-1] if words else None
+
+def textReply(text: str) -> dict:
+    return {"fulfillmentText": text, "fulfillmentMessages": [{"text": {"text": [text]}}]}
+
+# Fixed help/fallback replies, built once at import; callers only read the returned dicts.
+WELCOME_DEFAULT_TEXT = "Hello and welcome!"
+UNHANDLED_TEXT = "I'm sorry, I didn't understand that request."
+EUROLEAGUE_HELP_TEXT = "Please provide game year and either game code or game number."
+WEATHER_NO_CITY_TEXT = "Please provide a city name for weather forecast."
+PLACES_HELP_TEXT = "Please provide a city and place type, e.g., 'restaurants in Rome' or 'parks in Tel Aviv'."
+WELCOME_DEFAULT_REPLY = textReply(WELCOME_DEFAULT_TEXT)
+UNHANDLED_REPLY = textReply(UNHANDLED_TEXT)
+EUROLEAGUE_HELP_REPLY = textReply(EUROLEAGUE_HELP_TEXT)
+WEATHER_NO_CITY_REPLY = textReply(WEATHER_NO_CITY_TEXT)
+PLACES_HELP_REPLY = textReply(PLACES_HELP_TEXT)
+
+# Seconds a fulfillment stays fresh per intent. Intents not listed are never cached; the welcome reply is
+# built from Dialogflow's own fulfillmentMessages without any I/O, so it is not cached either.
+# Euroleague "last/next game" answers turn over at tip-off; EuroleagueService keeps the feeds longer anyway.
+INTENT_CACHE_TTL = {
+    "GetWeather": 60,
+    "GetEuroleague": 60,
+    "GetPlaces": 3600
+}
+INTENT_CACHE_SIZE = 1024
+# Service failures are retried on the next request rather than cached.
+ERROR_REPLY_RE = re.compile(r"^(?:Error\b|Failed to\b|(?:I'm )?sorry, I couldn't\b)", re.IGNORECASE)
+
+def freezeValue(value):
+    # Dialogflow parameters are nested dicts/lists; turn them into something hashable for a cache key.
+    if isinstance(value, dict):
+        return tuple(sorted((key, freezeValue(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(freezeValue(item) for item in value)
+    return value
+
+class IntentCache:
+    # Small LRU with per-entry expiry; processRequest runs on executor threads, hence the lock.
+    def __init__(self, ttl, maxsize: int = INTENT_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expiresAt, value = entry
+            if expiresAt is not None and expiresAt <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        expiresAt = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (expiresAt, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
 
 class DialogflowHandler:
     def __init__(self, telegramBot, weatherService, euroleagueService, placesApiService):
@@ -13,66 +135,90 @@ class DialogflowHandler:
         self.weatherService = weatherService
         self.euroleagueService = euroleagueService
         self.placesApiService = placesApiService
-        logging.info("DialogflowHandler initialized.")
+        # Every handler takes (queryResult, parameters); unknown intents fall through to handleUnhandledIntent.
+        self.intentHandlers = {
+            "GetEuroleague": self.handleEuroleagueIntent,
+            "GetWeather": self.handleWeatherIntent,
+            "GetPlaces": self.handlePlacesIntent,
+            "DefaultWelcomeIntent": self.handleDefaultWelcome
+        }
+        self.intentCaches = {intent: IntentCache(ttl) for intent, ttl in INTENT_CACHE_TTL.items()}
+        logger.info("DialogflowHandler initialized.")
+
+    def clearCache(self, intentDisplayName: str = None) -> None:
+        # Drop cached fulfillments for one intent, or for all of them.
+        if intentDisplayName is None:
+            for cache in self.intentCaches.values():
+                cache.clear()
+        elif intentDisplayName in self.intentCaches:
+            self.intentCaches[intentDisplayName].clear()
 
     def getIntentDisplayName(self, queryResult: dict) -> str:
         intentObj = queryResult.get("intent", {})
         return intentObj.get("displayName") or intentObj.get("display_name", "")
 
-    def handleDefaultWelcome(self, queryResult: dict) -> dict:
+    def handleDefaultWelcome(self, queryResult: dict, parameters: dict = None) -> dict:
         messages = queryResult.get("fulfillmentMessages", [])
         for msg in messages:
             if "payload" in msg:
                 tgPayload = msg["payload"].get("telegram", {})
                 text = tgPayload.get("text", "")
                 return {"fulfillmentText": text, "fulfillmentMessages": [msg]}
-        defaultMsg = "Hello and welcome!"
-        logging.info("DefaultWelcomeIntent payload not found, using default message.")
-        return {"fulfillmentText": defaultMsg, "fulfillmentMessages": [{"text": {"text": [defaultMsg]}}]}
+        logger.info("DefaultWelcomeIntent payload not found, using default message.")
+        return WELCOME_DEFAULT_REPLY
 
     def handleUnhandledIntent(self, intentDisplayName: str) -> dict:
-        defaultMsg = "I'm sorry, I didn't understand that request."
-        logging.info(f"Unhandled intent: {intentDisplayName}.")
-        return {"fulfillmentText": defaultMsg, "fulfillmentMessages": [{"text": {"text": [defaultMsg]}}]}
+        logger.info("Unhandled intent: %s.", intentDisplayName)
+        return UNHANDLED_REPLY
 
     def processRequest(self, requestJson: dict) -> dict:
-        logging.info("Processing Dialogflow request.")
+        logger.info("Processing Dialogflow request.")
         queryResult = requestJson.get("queryResult", {})
         intentDisplayName = self.getIntentDisplayName(queryResult)
         if not intentDisplayName:
-            logging.info("Empty queryResult or missing intent. Ignoring request.")
+            logger.info("Empty queryResult or missing intent. Ignoring request.")
             return {"status": "ok"}
         parameters = queryResult.get("parameters", {})
-        logging.info(f"Intent detected: {intentDisplayName}")
-        logging.info(f"Parameters: {parameters}")
-        if intentDisplayName == "GetEuroleague":
-            return self.handleEuroleagueIntent(queryResult, parameters)
-        elif intentDisplayName == "GetWeather":
-            return self.handleWeatherIntent(queryResult, parameters)
-        elif intentDisplayName == "GetPlaces":
-            return self.handlePlacesIntent(queryResult, parameters)
-        elif intentDisplayName == "DefaultWelcomeIntent":
-            return self.handleDefaultWelcome(queryResult)
-        else:
+        logger.info("Intent detected: %s", intentDisplayName)
+        logger.info("Parameters: %s", parameters)
+        handler = self.intentHandlers.get(intentDisplayName)
+        if handler is None:
             return self.handleUnhandledIntent(intentDisplayName)
+        cache = self.intentCaches.get(intentDisplayName)
+        if cache is None:
+            return handler(queryResult, parameters)
+        # Handlers read queryText as well as the parameters, so both are part of the key.
+        cacheKey = (freezeValue(parameters), queryResult.get("queryText", "").strip().lower())
+        cached = cache.get(cacheKey)
+        if cached is not None:
+            logger.info("Returning cached fulfillment for %s.", intentDisplayName)
+            return cached
+        result = handler(queryResult, parameters)
+        if ERROR_REPLY_RE.match(result.get("fulfillmentText", "")):
+            logger.info("Not caching error fulfillment for %s.", intentDisplayName)
+        else:
+            cache.set(cacheKey, result)
+        return result
+
+    def processRequestBytes(self, requestJson: dict) -> bytes:
+        # Same fulfillment as processRequest, already serialized so the web layer can send it as is.
+        return orjson.dumps(self.processRequest(requestJson))
 
     # --- Helper functions for Euroleague intent ---
     def parseGameYear(self, gameYearRaw):
         if gameYearRaw:
-            match = re.search(r'(20\d{2})', gameYearRaw)
+            match = YEAR_RE.search(gameYearRaw)
             if match:
                 return "E" + match.group(1)
             return "E2024"
         return "E2024"
 
     def handleEuroleagueDefault(self, teamName, gameYear, queryText, dateTime=None):
-        lastSyn = ["last", "latest", "previous", "most recent", "past", "final"]
-        nextSyn = ["next", "upcoming", "coming", "following", "future", "subsequent"]
         # If there is a request for the next game
-        if any(s in queryText for s in nextSyn):
+        if NEXT_GAME_RE.search(queryText):
             result = self.euroleagueService.getNextGameFormatted(gameYear, teamName)
         # If there is a request for the last game, or dateTime is missing (or empty), return the last game by default
-        elif any(s in queryText for s in lastSyn) or not dateTime:
+        elif LAST_GAME_RE.search(queryText) or not dateTime:
             result = self.euroleagueService.getLastGameResult(gameYear, teamName)
         # If there is a dateTime, search for games by date
         elif dateTime:
@@ -80,8 +226,8 @@ class DialogflowHandler:
             result = self.euroleagueService.getSeasonResults(gameYear, teamName)
         else:
             result = self.euroleagueService.getSeasonResults(gameYear, teamName)
-        logging.info("Returning Euroleague results.")
-        return {"fulfillmentText": result, "fulfillmentMessages": [{"text": {"text": [result]}}]}
+        logger.info("Returning Euroleague results.")
+        return textReply(result)
 
     def handleEuroleagueGameCode(self, teamName, gameYear, gameCode):
         try:
@@ -89,8 +235,8 @@ class DialogflowHandler:
         except ValueError:
             codeInt = 0
         result = self.euroleagueService.getGameResults(gameYear, codeInt, teamName)
-        logging.info("Returning Euroleague results for game code.")
-        return {"fulfillmentText": result, "fulfillmentMessages": [{"text": {"text": [result]}}]}
+        logger.info("Returning Euroleague results for game code.")
+        return textReply(result)
 
     def handleEuroleagueGameNumber(self, teamName, gameYear, gameNumber):
         try:
@@ -98,8 +244,8 @@ class DialogflowHandler:
         except ValueError:
             numInt = 0
         result = self.euroleagueService.getSchedules(gameYear, numInt, teamName)
-        logging.info("Returning Euroleague schedules for game number.")
-        return {"fulfillmentText": result, "fulfillmentMessages": [{"text": {"text": [result]}}]}
+        logger.info("Returning Euroleague schedules for game number.")
+        return textReply(result)
 
     def handleEuroleagueIntent(self, queryResult: dict, parameters: dict) -> dict:
         teamName = parameters.get("team")
@@ -111,9 +257,9 @@ class DialogflowHandler:
         queryText = queryResult.get("queryText", "").lower()
 
         # Enhancement: If euroSeason (gameYearRaw) contains 'next' or 'upcoming', treat as request for next game
-        if teamName and gameYearRaw and any(x in gameYearRaw.lower() for x in ["next", "upcoming"]):
+        if teamName and gameYearRaw and UPCOMING_SEASON_RE.search(gameYearRaw):
             result = self.euroleagueService.getNextGameFormatted(gameYear, teamName)
-            return {"fulfillmentText": result, "fulfillmentMessages": [{"text": {"text": [result]}}]}
+            return textReply(result)
 
         if teamName and gameYear and not gameCode and not gameNumber:
             return self.handleEuroleagueDefault(teamName, gameYear, queryText, dateTime)
@@ -121,9 +267,8 @@ class DialogflowHandler:
             return self.handleEuroleagueGameCode(teamName, gameYear, gameCode)
         elif teamName and gameYear and gameNumber:
             return self.handleEuroleagueGameNumber(teamName, gameYear, gameNumber)
-        infoMsg = "Please provide game year and either game code or game number."
-        logging.info(infoMsg)
-        return {"fulfillmentText": infoMsg, "fulfillmentMessages": [{"text": {"text": [infoMsg]}}]}
+        logger.info(EUROLEAGUE_HELP_TEXT)
+        return EUROLEAGUE_HELP_REPLY
 
     def handleWeatherIntent(self, queryResult: dict, parameters: dict) -> dict:
         geoCity = parameters.get("geo-city")
@@ -131,53 +276,35 @@ class DialogflowHandler:
         queryText = queryResult.get("queryText", "")
         if isinstance(forecastType, list):
             forecastType = " ".join(forecastType)
-        logging.info(f"Extracted forecastType: {forecastType}")
+        logger.info("Extracted forecastType: %s", forecastType)
 
         # --- Enhancement: Detect city-like words in queryText if geoCity is missing ---
         if not geoCity:
-            import re
-            # Try to extract a city name after 'in', 'at', or 'for' (e.g., 'weather in Hogwarts', 'weather at Wakanda', 'weather for Gotham')
-            match = re.search(r'(?:in|at|for)\s+([A-Za-z\s]+)[?\.!]*$', queryText)
-            possible_city = None
-            if match:
-                possible_city = match.group(1).strip()
-            else:
-                # If not found, try to extract the last word (excluding stopwords and punctuation) as a possible city
-                words = re.findall(r'\b[A-Za-z]+\b', queryText)
-                stopwords = set(['weather', 'what', 'is', 'the', 'will', 'be', 'like', 'forecast', 'in', 'at', 'for', 'on', 'of', 'tell', 'me', 'please', 'today', 'tomorrow'])
-                filtered = [w for w in words if w.lower() not in stopwords]
-                if filtered:
-                    possible_city = filtered[-1]
+            possible_city = guessCityName(queryText)
             if possible_city:
-                weatherInfo = f"Sorry, I couldn't find any city named {possible_city}. Please try another city."
-                logging.info(f"City not found: {possible_city}")
-            else:
-                weatherInfo = "Please provide a city name for weather forecast."
-                logging.info("No city provided.")
-            return {"fulfillmentText": weatherInfo, "fulfillmentMessages": [{"text": {"text": [weatherInfo]}}]}
+                logger.info("City not found: %s", possible_city)
+                return textReply(f"Sorry, I couldn't find any city named {possible_city}. Please try another city.")
+            logger.info("No city provided.")
+            return WEATHER_NO_CITY_REPLY
 
         # --- Enhancement: If forecastType is empty but queryText contains future words, pass them to weatherService ---
-        import re
-        future_keywords = ["tomorrow", "in \\d+ days", "in one day", "in two days", "in three days", "after tomorrow", "next week"]
-        found_future = False
-        for kw in future_keywords:
-            if re.search(kw, queryText, re.IGNORECASE):
-                forecastType = kw if "tomorrow" in kw else queryText
-                found_future = True
-                break
+        # "tomorrow" wins over the other phrases; those pass the whole query through for the service to parse.
+        if TOMORROW_RE.search(queryText):
+            forecastType = "tomorrow"
+        elif FUTURE_RE.search(queryText):
+            forecastType = queryText
         weatherInfo = self.weatherService.getWeatherData(
             geoCity, forecastType, original_query=queryText
         )
-        logging.info("Returning weather data.")
-        return {"fulfillmentText": weatherInfo, "fulfillmentMessages": [{"text": {"text": [weatherInfo]}}]}
+        logger.info("Returning weather data.")
+        return textReply(weatherInfo)
 
     def handlePlacesIntent(self, queryResult: dict, parameters: dict) -> dict:
         placeType = parameters.get("place-type")
         city = parameters.get("geo-city")
         if not placeType or not city:
-            infoMsg = ("Please provide a city and place type, e.g., 'restaurants in Rome' or 'parks in Tel Aviv'.")
-            logging.info(infoMsg)
-            return {"fulfillmentText": infoMsg, "fulfillmentMessages": [{"text": {"text": [infoMsg]}}]}
+            logger.info(PLACES_HELP_TEXT)
+            return PLACES_HELP_REPLY
         result = self.placesApiService.getPlaces(placeType, city)
-        logging.info("Returning Places API results.")
-        return {"fulfillmentText": result, "fulfillmentMessages": [{"text": {"text": [result]}}]}
+        logger.info("Returning Places API results.")
+        return textReply(result)
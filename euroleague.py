@@ -1,58 +1,236 @@
 import requests
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import io
+from operator import itemgetter
+from functools import lru_cache
+import lxml.etree as ET
 import logging
+import threading
+import time
 from datetime import datetime
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+logger = logging.getLogger(__name__)
+
+# How long a downloaded feed is reused, in seconds: results change after games, schedules more often.
+RESULTS_TTL = 1800
+SCHEDULES_TTL = 300
+XML_CACHE_SIZE = 256
+# Parsed feeds and team indexes hold a whole season each; any season code a user sends adds one.
+PARSED_CACHE_SIZE = 16
+
+# XPath expressions compiled once; lxml evaluates them in C.
+GAME_CHILDREN = ET.XPath("game")
+ITEM_CHILDREN = ET.XPath("item")
+
+# The only fields the cached results/schedule entries are read for; the rest of each feed element is dropped.
+RESULT_FIELDS = frozenset({"date", "time", "round", "hometeam", "awayteam", "homescore", "awayscore", "played"})
+SCHEDULE_FIELDS = frozenset({"game", "gamecode", "date", "startime", "hometeam", "awayteam", "arenaname"})
+
+MONTHS = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+          "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
+
+@lru_cache(maxsize=4096)
+def parseGameDatetime(dateStr: str, timeStr: str = "00:00") -> datetime:
+    # Feed dates look like "Apr 10, 2023" and times like "20:00"; slicing them is much cheaper than strptime.
+    # A round shares a handful of dates and tip-off times, so repeats come straight from the cache.
+    # Anything unexpected goes through strptime, which raises the same errors as before.
+    try:
+        dayPart, _, yearPart = dateStr[4:].partition(",")
+        hourPart, _, minutePart = timeStr.partition(":")
+        return datetime(int(yearPart), MONTHS[dateStr[:3]], int(dayPart), int(hourPart), int(minutePart))
+    except (KeyError, ValueError):
+        return datetime.strptime(dateStr + " " + timeStr, "%b %d, %Y %H:%M")
+
+def feedDatetime(dateStr: str, timeStr: str) -> datetime:
+    # A "TBD" or missing tip-off time still places the game on its date; a bad date raises.
+    try:
+        return parseGameDatetime(dateStr, timeStr)
+    except ValueError:
+        return parseGameDatetime(dateStr)
+
+parserLocal = threading.local()
+
+def xmlParser() -> ET.XMLParser:
+    # Feeds are parsed on executor threads, so each thread gets its own parser; no ID table is needed.
+    parser = getattr(parserLocal, "parser", None)
+    if parser is None:
+        parser = parserLocal.parser = ET.XMLParser(huge_tree=False, collect_ids=False)
+    return parser
+
+def parseXml(data):
+    # Accepts the raw response bytes (which may carry an encoding declaration) or a plain str.
+    return ET.fromstring(data, parser=xmlParser())
+
+def elementDict(elem, keep: frozenset = None) -> dict:
+    # One pass over the children instead of a linear find() per field, optionally keeping only some tags.
+    if keep is None:
+        return {child.tag: child.text for child in elem}
+    return {child.tag: child.text for child in elem if child.tag in keep}
+
+def teamNames(game: dict) -> tuple:
+    # (home, away) case-folded; parsed feeds store it once so filters only do substring searches.
+    names = game.get("teams_folded")
+    if names is None:
+        names = ((game.get("hometeam") or "").casefold(), (game.get("awayteam") or "").casefold())
+    return names
+
+def teamMatches(game: dict, teamKey: str) -> bool:
+    # teamKey is the case-folded query; each side is checked on its own so "madrid barcelona" matches neither.
+    home, away = teamNames(game)
+    return teamKey in home or teamKey in away
+
+def iterElements(data: bytes, tag: str):
+    # Streams the matching elements and frees each one (and any earlier siblings) once the caller
+    # has moved on, so the full tree is never built; stopping early skips the rest of the document.
+    for _, elem in ET.iterparse(io.BytesIO(data), events=("end",), tag=tag, collect_ids=False):
+        yield elem
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
 
 class EuroleagueService:
     def __init__(self):
         self.baseUrlGames = "https://api-live.euroleague.net/v1/games"
         self.baseUrlResults = "https://api-live.euroleague.net/v1/results"
         self.baseUrlSchedules = "https://api-live.euroleague.net/v1/schedules"
-        logging.info("EuroleagueService initialized.")
+        # One pooled session for every feed; 502/503/504 from the live API are retried with backoff.
+        self.session = requests.Session()
+        self.session.headers.update({"accept": "application/xml"})
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+        self.xmlCache = {}
+        self.parsedCache = {}
+        self.teamIndexCache = {}
+        # Downloads currently running, by cache key; concurrent misses for the same feed wait on the first one.
+        self.inflight = {}
+        self.inflightLock = threading.Lock()
+        # Fetches run on executor threads; eviction, inserts and the counters are done under this lock.
+        self.cacheLock = threading.Lock()
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        logger.info("EuroleagueService initialized.")
+
+    def fetchXml(self, url: str, params: dict, ttl: int) -> (int, bytes):
+        # Returns (status code, body). Successful bodies are kept as raw XML for ttl seconds,
+        # so queries about different teams in the same season share one download.
+        key = (url, tuple(sorted(params.items())))
+        cached = self.xmlCache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            with self.cacheLock:
+                self.cacheHits += 1
+            logger.debug("Euroleague cache hit for %s %s (hits=%s, misses=%s)", url, params, self.cacheHits, self.cacheMisses)
+            return 200, cached[1]
+        with self.inflightLock:
+            pending = self.inflight.get(key)
+            isLeader = pending is None
+            if isLeader:
+                pending = self.inflight[key] = {"done": threading.Event(), "result": None}
+        if not isLeader:
+            pending["done"].wait()
+            if pending["result"] is not None:
+                return pending["result"]
+            # The shared download raised; make our own attempt.
+            return self.downloadXml(url, params, key)
+        try:
+            pending["result"] = self.downloadXml(url, params, key)
+            return pending["result"]
+        finally:
+            with self.inflightLock:
+                del self.inflight[key]
+            pending["done"].set()
+
+    def downloadXml(self, url: str, params: dict, key) -> (int, bytes):
+        with self.cacheLock:
+            self.cacheMisses += 1
+        response = self.session.get(url, params=params)
+        logger.debug("Fetched %s: %d bytes, Content-Encoding=%s", url, len(response.content), response.headers.get("Content-Encoding"))
+        if response.status_code == 200:
+            self.storeBounded(self.xmlCache, key, (time.monotonic(), response.content), XML_CACHE_SIZE)
+        return response.status_code, response.content
+
+    def storeBounded(self, cache: dict, key, value, maxsize: int) -> None:
+        # Insert, dropping the oldest entry once the cache is full.
+        with self.cacheLock:
+            if key not in cache and len(cache) >= maxsize:
+                cache.pop(next(iter(cache)), None)
+            cache[key] = value
+
+    def parsedFeed(self, kind: str, seasonCode: str, xmlText: bytes, parser):
+        # A parsed feed is reused for as long as the raw XML it came from is still the cached copy,
+        # so it expires together with the download and is shared by every team queried in between.
+        key = (kind, seasonCode)
+        cached = self.parsedCache.get(key)
+        if cached is not None and cached[0] is xmlText:
+            return cached[1]
+        parsed = parser(xmlText)
+        self.storeBounded(self.parsedCache, key, (xmlText, parsed), PARSED_CACHE_SIZE)
+        return parsed
+
+    def buildTeamIndex(self, games: list) -> dict:
+        # Full case-folded team name -> that team's games, in feed order.
+        index = {}
+        for game in games:
+            for side in ("hometeam", "awayteam"):
+                name = (game.get(side) or "").casefold()
+                if name:
+                    index.setdefault(name, []).append(game)
+        return index
+
+    def gamesForTeam(self, kind: str, seasonCode: str, games: list, teamName: str) -> list:
+        # Narrow a cached feed to one team by scanning the ~20 team names instead of every game.
+        # The index is rebuilt only when parsedFeed hands back a new list.
+        key = (kind, seasonCode)
+        cached = self.teamIndexCache.get(key)
+        if cached is None or cached[0] is not games:
+            cached = (games, self.buildTeamIndex(games))
+            self.storeBounded(self.teamIndexCache, key, cached, PARSED_CACHE_SIZE)
+        index = cached[1]
+        teamKey = teamName.casefold()
+        names = [name for name in index if teamKey in name]
+        if len(names) == 1:
+            return index[names[0]]
+        # Several teams match (e.g. "real"): keep feed order and list a game between two of them once.
+        matched = {id(game) for name in names for game in index[name]}
+        return [game for game in games if id(game) in matched]
 
     def parseResultsXml(self, xmlString: str) -> list:
-        root = ET.fromstring(xmlString)
+        root = parseXml(xmlString)
         games = []
-        for game in root.findall("game"):
-            gameData = {child.tag: child.text for child in game}
-            dateStr = gameData.get("date", "").strip()
-            timeStr = gameData.get("time", "00:00").strip()
+        for game in GAME_CHILDREN(root):
+            gameData = elementDict(game, RESULT_FIELDS)
+            dateStr = (gameData.get("date") or "").strip()
+            timeStr = (gameData.get("time") or "00:00").strip()
             try:
-                gameData["datetime_obj"] = datetime.strptime(dateStr + " " + timeStr, "%b %d, %Y %H:%M")
+                gameData["datetime_obj"] = feedDatetime(dateStr, timeStr)
             except Exception as e:
-                logging.error(f"Date format error in results: {e}")
+                logger.error("Date format error in results: %s", e)
                 continue
+            gameData["teams_folded"] = teamNames(gameData)
             games.append(gameData)
-        games.sort(key=lambda x: x["datetime_obj"])
         return games
 
     def parseScheduleXml(self, xmlString: str) -> list:
-        root = ET.fromstring(xmlString)
+        root = parseXml(xmlString)
         items = []
-        for item in root.findall("item"):
-            itemData = {child.tag: child.text for child in item}
-            dateStr = itemData.get("date", "").strip()
-            timeStr = itemData.get("startime", "00:00").strip()
+        for item in ITEM_CHILDREN(root):
+            itemData = elementDict(item, SCHEDULE_FIELDS)
+            dateStr = (itemData.get("date") or "").strip()
+            timeStr = (itemData.get("startime") or "00:00").strip()
             try:
-                itemData["datetime_obj"] = datetime.strptime(dateStr + " " + timeStr, "%b %d, %Y %H:%M")
+                itemData["datetime_obj"] = feedDatetime(dateStr, timeStr)
             except Exception as e:
-                logging.error(f"Date format error in schedule: {e}")
+                logger.error("Date format error in schedule: %s", e)
                 continue
+            itemData["teams_folded"] = teamNames(itemData)
             items.append(itemData)
-        items.sort(key=lambda x: x["datetime_obj"])
         return items
 
-    def filterPastGames(self, games: list, teamName: str) -> list:
-        teamLower = teamName.lower()
-        now = datetime.now()
+    def filterPastGames(self, games: list, teamName: str, now: datetime = None) -> list:
+        teamKey = teamName.casefold()
+        now = now or datetime.now()
         return [g for g in games
-                if teamLower in ((g.get("hometeam", "").lower() + " " + g.get("awayteam", "").lower()))
+                if teamMatches(g, teamKey)
                 and g.get("played", "").lower() == "true"
                 and g["datetime_obj"] <= now]
 
@@ -64,110 +242,85 @@ class EuroleagueService:
         awayScore = game.get("awayscore", "N/A")
         return f"Last game for {teamName} on {dateText}:\n{homeTeam} {homeScore} - {awayScore} {awayTeam}"
 
-    def getLastGameResult(self, seasonCode: str, teamName: str) -> str:
-        logging.info(f"Fetching last game result for team: {teamName} in season: {seasonCode}")
-        params = {"seasonCode": seasonCode}
-        headers = {"accept": "application/xml"}
-        response = requests.get(self.baseUrlResults, params=params, headers=headers)
-        if response.status_code != 200:
-            return f"Failed to fetch results. Status code: {response.status_code}"
+    def getLastGameResult(self, seasonCode: str, teamName: str, now: datetime = None) -> str:
+        logger.debug("Fetching last game result for team: %s in season: %s", teamName, seasonCode)
+        statusCode, xmlText = self.fetchXml(self.baseUrlResults, {"seasonCode": seasonCode}, RESULTS_TTL)
+        if statusCode != 200:
+            return f"Failed to fetch results. Status code: {statusCode}"
         try:
-            games = self.parseResultsXml(response.text)
-            pastGames = self.filterPastGames(games, teamName)
+            games = self.parsedFeed("results", seasonCode, xmlText, self.parseResultsXml)
+            pastGames = self.filterPastGames(self.gamesForTeam("results", seasonCode, games, teamName), teamName, now)
             if not pastGames:
                 return f"No past played games found for {teamName} in season {seasonCode}."
-            lastGame = pastGames[-1]
+            # One pass for the latest game; the feed is not sorted up front any more.
+            lastGame = max(pastGames, key=itemgetter("datetime_obj"))
             return self.formatLastGame(lastGame, teamName)
         except Exception as e:
-            logging.error(f"Error processing last game result: {e}")
+            logger.error("Error processing last game result: %s", e)
             return f"Error processing last game result: {str(e)}"
 
-    def extractGameDatetime(self, item: ET.Element):
-        dateElem = item.find("date")
-        timeElem = item.find("startime")
-        if dateElem is None:
+    def extractGameDatetime(self, item: ET.Element, fields: dict = None):
+        fields = fields if fields is not None else elementDict(item)
+        if "date" not in fields:
             return None
-        dateText = dateElem.text
-        timeText = timeElem.text if timeElem is not None else "00:00"
+        dateText = fields["date"]
+        timeText = fields.get("startime", "00:00")
         try:
-            dt = datetime.strptime(dateText + " " + timeText, "%b %d, %Y %H:%M")
+            dt = parseGameDatetime(dateText, timeText)
             return dt, item
         except Exception as e:
-            logging.error(f"Error parsing game datetime: {e}")
+            logger.error("Error parsing game datetime: %s", e)
             return None
 
-    def formatNextGame(self, item: ET.Element, teamName: str) -> str:
-        game = item.find("game").text if item.find("game") is not None else "N/A"
-        gameCode = item.find("gamecode").text if item.find("gamecode") is not None else "N/A"
-        dateStr = item.find("date").text if item.find("date") is not None else "N/A"
-        startTime = item.find("startime").text if item.find("startime") is not None else "N/A"
-        homeTeam = item.find("hometeam").text if item.find("hometeam") is not None else "N/A"
-        awayTeam = item.find("awayteam").text if item.find("awayteam") is not None else "N/A"
+    def formatNextGame(self, item, teamName: str) -> str:
+        # Takes a parsed schedule entry or a raw <item> element.
+        fields = item if isinstance(item, dict) else elementDict(item)
+        game = fields.get("game", "N/A")
+        gameCode = fields.get("gamecode", "N/A")
+        dateStr = fields.get("date", "N/A")
+        startTime = fields.get("startime", "N/A")
+        homeTeam = fields.get("hometeam", "N/A")
+        awayTeam = fields.get("awayteam", "N/A")
         return (f"Next game for {teamName}:\nGame: {game}, Code: {gameCode}\n"
                 f"Date: {dateStr} at {startTime}\n{homeTeam} vs {awayTeam}")
 
-    def getNextGame(self, seasonCode: str, teamName: str) -> str:
+    def getNextGame(self, seasonCode: str, teamName: str, now: datetime = None) -> str:
         # Return the next scheduled game for a given team in a season.
-        logging.info(f"Fetching next game for team: {teamName} in season: {seasonCode}")
-        params = {"seasonCode": seasonCode}
-        headers = {"accept": "application/xml"}
-        response = requests.get(self.baseUrlSchedules, params=params, headers=headers)
-        if response.status_code != 200:
-            return f"Failed to fetch schedules. Status code: {response.status_code}"
+        logger.debug("Fetching next game for team: %s in season: %s", teamName, seasonCode)
+        statusCode, xmlText = self.fetchXml(self.baseUrlSchedules, {"seasonCode": seasonCode}, SCHEDULES_TTL)
+        if statusCode != 200:
+            return f"Failed to fetch schedules. Status code: {statusCode}"
         try:
-            root = ET.fromstring(response.text)
-            items = root.findall(".//item")
+            # Shares the parsed schedule and its team index with getNextGameFormatted.
+            items = self.parsedFeed("schedules", seasonCode, xmlText, self.parseScheduleXml)
             if not items:
                 return f"No schedule items found for season {seasonCode}."
-            nextGames = self.filterUpcomingGames(items, teamName)
+            nextGames = self.filterUpcomingGamesDict(self.gamesForTeam("schedules", seasonCode, items, teamName), teamName, now)
             if not nextGames:
                 return f"No upcoming games found for {teamName} in season {seasonCode}."
-            nextGames.sort(key=lambda x: x[0])
-            return self.formatNextGame(nextGames[0][1], teamName)
+            return self.formatNextGame(min(nextGames, key=itemgetter(0))[1], teamName)
         except Exception as e:
-            logging.error(f"Error processing next game: {e}")
+            logger.error("Error processing next game: %s", e)
             return f"Error processing next game: {str(e)}"
 
-    def getNextGameFormatted(self, seasonCode: str, teamName: str) -> str:
+    def getNextGameFormatted(self, seasonCode: str, teamName: str, now: datetime = None) -> str:
         # Return the next scheduled game for a team, formatted with details.
-        logging.info(f"Fetching next game formatted for team: {teamName} in season: {seasonCode}")
-        params = {"seasonCode": seasonCode}
-        headers = {"accept": "application/xml"}
-        response = requests.get(self.baseUrlSchedules, params=params, headers=headers)
-        if response.status_code != 200:
-            return f"Failed to fetch schedules. Status code: {response.status_code}"
+        logger.debug("Fetching next game formatted for team: %s in season: %s", teamName, seasonCode)
+        statusCode, xmlText = self.fetchXml(self.baseUrlSchedules, {"seasonCode": seasonCode}, SCHEDULES_TTL)
+        if statusCode != 200:
+            return f"Failed to fetch schedules. Status code: {statusCode}"
         try:
-            items = self.parseScheduleXml(response.text)
+            items = self.parsedFeed("schedules", seasonCode, xmlText, self.parseScheduleXml)
             if not items:
                 return f"No schedule items found for season {seasonCode}."
-            nextGames = self.filterUpcomingGamesDict(items, teamName)
+            nextGames = self.filterUpcomingGamesDict(self.gamesForTeam("schedules", seasonCode, items, teamName), teamName, now)
             if not nextGames:
                 return f"No upcoming games found for {teamName} in season {seasonCode}."
-            nextGames.sort(key=lambda x: x[0])
-            return self.formatNextGameFormatted(nextGames[0][1], teamName)
+            return self.formatNextGameFormatted(min(nextGames, key=itemgetter(0))[1], teamName)
         except Exception as e:
-            logging.error(f"Error processing next game formatted: {e}")
+            logger.error("Error processing next game formatted: %s", e)
             return f"Error processing next game: {str(e)}"
 
-    def getSeasonResults(self, seasonCode: str, teamName: str) -> str:
-        # Return all games for a team in a season, sorted by date.
-        logging.info(f"Fetching season results for team: {teamName} in season: {seasonCode}")
-        params = {"seasonCode": seasonCode}
-        headers = {"accept": "application/xml"}
-        response = requests.get(self.baseUrlResults, params=params, headers=headers)
-        if response.status_code != 200:
-            return f"Failed to fetch results. Status code: {response.status_code}"
-        try:
-            root = ET.fromstring(response.text)
-            gamesList = self.collectTeamGames(root, teamName)
-            if not gamesList:
-                return f"No games found for {teamName} in season {seasonCode}."
-            gamesList.sort(key=lambda x: x[0])
-            return "\n".join([line for _, line in gamesList])
-        except Exception as e:
-            logging.error(f"Error processing season results: {e}")
-            return f"Error processing season results: {str(e)}"
-
     def formatNextGameFormatted(self, item: dict, teamName: str) -> str:
         dateStr = item.get("date", "N/A")
         startTime = item.get("startime", "N/A")
@@ -177,17 +330,16 @@ class EuroleagueService:
         return (f"Next game for {teamName}:\nArena: {arena}\n"
                 f"Date: {dateStr} at {startTime}\n{homeTeam} vs {awayTeam}")
 
-    def filterUpcomingGames(self, items, teamName):
+    def filterUpcomingGames(self, items, teamName, now: datetime = None):
         """Filter and return upcoming games for the given team from XML items."""
-        now = datetime.now()
-        teamLower = teamName.lower()
+        now = now or datetime.now()
+        teamKey = teamName.casefold()
         nextGames = []
         for item in items:
-            hometeam = item.find("hometeam").text if item.find("hometeam") is not None else ""
-            awayteam = item.find("awayteam").text if item.find("awayteam") is not None else ""
-            if teamLower not in (hometeam.lower() + " " + awayteam.lower()):
+            fields = elementDict(item)
+            if not teamMatches(fields, teamKey):
                 continue
-            result = self.extractGameDatetime(item)
+            result = self.extractGameDatetime(item, fields)
             if result is None:
                 continue
             dt, validItem = result
@@ -195,13 +347,13 @@ class EuroleagueService:
                 nextGames.append((dt, validItem))
         return nextGames
 
-    def filterUpcomingGamesDict(self, items, teamName):
+    def filterUpcomingGamesDict(self, items, teamName, now: datetime = None):
         """Filter and return upcoming games for the given team from parsed dict items."""
-        now = datetime.now()
-        teamLower = teamName.lower()
+        now = now or datetime.now()
+        teamKey = teamName.casefold()
         nextGames = []
         for item in items:
-            if teamLower not in (item.get("hometeam", "").lower() + " " + item.get("awayteam", "").lower()):
+            if not teamMatches(item, teamKey):
                 continue
             if "datetime_obj" not in item:
                 continue
@@ -213,119 +365,100 @@ class EuroleagueService:
     def collectTeamGames(self, root, teamName):
         # Collect and return all games for a team from XML root.
         gamesList = []
-        teamLower = teamName.lower()
+        teamKey = teamName.casefold()
         for game in root.findall(".//game"):
-            ht = game.find("hometeam").text if game.find("hometeam") is not None else ""
-            at = game.find("awayteam").text if game.find("awayteam") is not None else ""
-            if teamLower in (ht.lower() + " " + at.lower()):
-                dt, line = self.formatSeasonGame(game)
+            fields = elementDict(game)
+            if teamMatches(fields, teamKey):
+                dt, line = self.formatSeasonGame(fields)
                 gamesList.append((dt, line))
         return gamesList
 
-    def formatSeasonGame(self, game: ET.Element) -> (datetime, str):
-        homeTeam = game.find("hometeam").text if game.find("hometeam") is not None else ""
-        awayTeam = game.find("awayteam").text if game.find("awayteam") is not None else ""
-        dateText = game.find("date").text if game.find("date") is not None else "N/A"
+    def formatSeasonGame(self, game) -> (datetime, str):
+        # Takes a parsed results entry or a raw <game> element.
+        fields = game if isinstance(game, dict) else elementDict(game)
+        homeTeam = fields.get("hometeam", "")
+        awayTeam = fields.get("awayteam", "")
+        dateText = fields.get("date", "N/A")
         try:
-            dateObj = datetime.strptime(dateText.strip(), "%b %d, %Y")
+            dateObj = parseGameDatetime(dateText.strip())
         except Exception as e:
-            logging.error(f"Date parsing error: {e}")
+            logger.error("Date parsing error: %s", e)
             dateObj = datetime.min
-        roundStr = game.find("round").text if game.find("round") is not None else "N/A"
-        homeScore = game.find("homescore").text if game.find("homescore") is not None else "N/A"
-        awayScore = game.find("awayscore").text if game.find("awayscore") is not None else "N/A"
+        roundStr = fields.get("round", "N/A")
+        homeScore = fields.get("homescore", "N/A")
+        awayScore = fields.get("awayscore", "N/A")
         resultLine = f"{dateText}: {homeTeam} {homeScore} - {awayScore} {awayTeam} (Round: {roundStr})"
         return dateObj, resultLine
 
     def getSeasonResults(self, seasonCode: str, teamName: str) -> str:
-        logging.info(f"Fetching season results for team: {teamName} in season: {seasonCode}")
-        params = {"seasonCode": seasonCode}
-        headers = {"accept": "application/xml"}
-        response = requests.get(self.baseUrlResults, params=params, headers=headers)
-        if response.status_code != 200:
-            return f"Failed to fetch results. Status code: {response.status_code}"
+        # Return all games for a team in a season, sorted by date.
+        logger.debug("Fetching season results for team: %s in season: %s", teamName, seasonCode)
+        statusCode, xmlText = self.fetchXml(self.baseUrlResults, {"seasonCode": seasonCode}, RESULTS_TTL)
+        if statusCode != 200:
+            return f"Failed to fetch results. Status code: {statusCode}"
         try:
-            root = ET.fromstring(response.text)
-            gamesList = []
-            teamLower = teamName.lower()
-            for game in root.findall(".//game"):
-                ht = game.find("hometeam").text if game.find("hometeam") is not None else ""
-                at = game.find("awayteam").text if game.find("awayteam") is not None else ""
-                if teamLower in (ht.lower() + " " + at.lower()):
-                    dt, line = self.formatSeasonGame(game)
-                    gamesList.append((dt, line))
+            # Shares the parsed results and their team index with getLastGameResult.
+            games = self.parsedFeed("results", seasonCode, xmlText, self.parseResultsXml)
+            gamesList = [self.formatSeasonGame(game) for game in self.gamesForTeam("results", seasonCode, games, teamName)]
             if not gamesList:
                 return f"No games found for {teamName} in season {seasonCode}."
-            gamesList.sort(key=lambda x: x[0])
+            gamesList.sort(key=itemgetter(0))
             return "\n".join([line for _, line in gamesList])
         except Exception as e:
-            logging.error(f"Error processing season results: {e}")
+            logger.error("Error processing season results: %s", e)
             return f"Error processing season results: {str(e)}"
 
     def formatResults(self, gameResults: ET.Element) -> str:
-        roundStr = gameResults.find("round").text if gameResults.find("round") is not None else ""
-        gameDay = gameResults.find("gameday").text if gameResults.find("gameday") is not None else ""
-        date = gameResults.find("date").text if gameResults.find("date") is not None else ""
-        time_ = gameResults.find("time").text if gameResults.find("time") is not None else ""
-        homeTeam = gameResults.find("homeTeam").text if gameResults.find("homeTeam") is not None else ""
-        homeScore = gameResults.find("homescore").text if gameResults.find("homescore") is not None else ""
-        awayTeam = gameResults.find("awayTeam").text if gameResults.find("awayTeam") is not None else ""
-        awayScore = gameResults.find("awayscore").text if gameResults.find("awayscore") is not None else ""
+        fields = elementDict(gameResults)
+        roundStr = fields.get("round", "")
+        gameDay = fields.get("gameday", "")
+        date = fields.get("date", "")
+        time_ = fields.get("time", "")
+        homeTeam = fields.get("homeTeam", "")
+        homeScore = fields.get("homescore", "")
+        awayTeam = fields.get("awayTeam", "")
+        awayScore = fields.get("awayscore", "")
         return (f"Results:\nRound: {roundStr}\nGame Day: {gameDay}\nDate: {date}\nTime: {time_}\n"
                 f"{homeTeam} {homeScore} - {awayScore} {awayTeam}")
 
     def getResults(self, seasonCode: str, gameNumber: int) -> str:
-        logging.info(f"Fetching results for season: {seasonCode}, game number: {gameNumber}")
-        params = {"seasonCode": seasonCode, "gameNumber": gameNumber}
-        headers = {"accept": "application/xml"}
-        response = requests.get(self.baseUrlResults, params=params, headers=headers)
-        if response.status_code != 200:
-            return f"Failed to retrieve results. Status code: {response.status_code}"
+        logger.debug("Fetching results for season: %s, game number: %s", seasonCode, gameNumber)
+        statusCode, xmlText = self.fetchXml(self.baseUrlResults, {"seasonCode": seasonCode, "gameNumber": gameNumber}, RESULTS_TTL)
+        if statusCode != 200:
+            return f"Failed to retrieve results. Status code: {statusCode}"
         try:
-            root = ET.fromstring(response.text)
-            gameResults = root.find(".//gameResults")
-            if gameResults is not None:
+            for gameResults in iterElements(xmlText, "gameResults"):
                 result = self.formatResults(gameResults)
-                logging.info("Results parsed successfully.")
+                logger.debug("Results parsed successfully.")
                 return result
-            else:
-                logging.error("No game results found in XML.")
-                return "No game results found."
+            logger.error("No game results found in XML.")
+            return "No game results found."
         except Exception as e:
-            logging.error(f"Error parsing results: {e}")
+            logger.error("Error parsing results: %s", e)
             return f"Error parsing results: {str(e)}"
 
     def formatScheduleItem(self, item: ET.Element) -> str:
-        game = item.find("game")
-        gamecode = item.find("gamecode")
-        date = item.find("date")
-        startTime = item.find("startime")
-        homeTeam = item.find("hometeam")
-        awayTeam = item.find("awayteam")
-        return (f"Game: {game.text if game is not None else 'N/A'}, "
-                f"Code: {gamecode.text if gamecode is not None else 'N/A'}, "
-                f"Date: {date.text if date is not None else 'N/A'}, "
-                f"Start Time: {startTime.text if startTime is not None else 'N/A'}, "
-                f"{homeTeam.text if homeTeam is not None else 'N/A'} vs "
-                f"{awayTeam.text if awayTeam is not None else 'N/A'}")
+        fields = elementDict(item)
+        return (f"Game: {fields.get('game', 'N/A')}, "
+                f"Code: {fields.get('gamecode', 'N/A')}, "
+                f"Date: {fields.get('date', 'N/A')}, "
+                f"Start Time: {fields.get('startime', 'N/A')}, "
+                f"{fields.get('hometeam', 'N/A')} vs "
+                f"{fields.get('awayteam', 'N/A')}")
 
     def getSchedules(self, seasonCode: str, gameNumber: int, teamName: str) -> str:
-        logging.info(f"Fetching schedules for season: {seasonCode}, game number: {gameNumber}, team: {teamName}")
-        params = {"seasonCode": seasonCode, "gameNumber": gameNumber}
-        headers = {"accept": "application/xml"}
-        response = requests.get(self.baseUrlSchedules, params=params, headers=headers)
-        if response.status_code != 200:
-            return f"Failed to retrieve schedules. Status code: {response.status_code}"
+        logger.debug("Fetching schedules for season: %s, game number: %s, team: %s", seasonCode, gameNumber, teamName)
+        statusCode, xmlText = self.fetchXml(self.baseUrlSchedules, {"seasonCode": seasonCode, "gameNumber": gameNumber}, SCHEDULES_TTL)
+        if statusCode != 200:
+            return f"Failed to retrieve schedules. Status code: {statusCode}"
         try:
-            root = ET.fromstring(response.text)
-            items = root.findall(".//item")
-            if items:
-                results = [self.formatScheduleItem(item) for item in items]
-                logging.info("Schedules parsed successfully.")
+            results = [self.formatScheduleItem(item) for item in iterElements(xmlText, "item")]
+            if results:
+                logger.debug("Schedules parsed successfully.")
                 return "\n".join(results)
             else:
-                logging.info("No schedule items found.")
+                logger.info("No schedule items found.")
                 return "No schedule items found."
         except Exception as e:
-            logging.error(f"Error parsing schedule response: {e}")
+            logger.error("Error parsing schedule response: %s", e)
             return f"Error parsing schedule response: {str(e)}"
@@ -1,12 +1,28 @@
+import atexit
+import queue
 import uvicorn
 import logging
-from controller import app
+import logging.handlers
+
+def configureLogging() -> None:
+    # Request handlers only enqueue records; a listener thread formats and writes them to stderr.
+    logQueue = queue.Queue(-1)
+    streamHandler = logging.StreamHandler()
+    streamHandler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    listener = logging.handlers.QueueListener(logQueue, streamHandler, respect_handler_level=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(message)s",
+        handlers=[logging.handlers.QueueHandler(logQueue)],
+        force=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+configureLogging()
+
+# Imported after logging is configured so the service start-up messages are not dropped.
+from controller import app
 
 if __name__ == "__main__":
     logging.info("Starting server...")
@@ -1,64 +1,77 @@
+import re
+import orjson
 import requests
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+logger = logging.getLogger(__name__)
+
+PLACE_KEYWORDS = frozenset({
+    "restaurant", "restaurants", "park", "parks", "museum", "museums", "cafe", "cafes", "coffee shop", "coffee shops",
+    "bar", "bars", "hotel", "hotels", "pub", "pubs", "attraction", "attractions", "mall", "malls"
+})
+WORD_RE = re.compile(r"\w+")
 
 class PlacesApiService:
     def __init__(self, googleApiKey: str):
         self.apiKey = googleApiKey
         self.baseUrl = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-        logging.info("PlacesApiService initialized.")
+        # Reuse TLS connections to maps.googleapis.com across requests and executor threads.
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=32))
+        logger.info("PlacesApiService initialized.")
 
     def normalizePlaceType(self, query: str) -> str:
         # Extracts the main place type from the query (e.g., "restaurants", "parks", etc.).
-        import re
-        place_keywords = [
-            "restaurant", "restaurants", "park", "parks", "museum", "museums", "cafe", "cafes", "coffee shop", "coffee shops",
-            "bar", "bars", "hotel", "hotels", "pub", "pubs", "attraction", "attractions", "mall", "malls"
-        ]
+        # Whole words only, so "barber" is not a bar; two-word types like "coffee shops" are checked as pairs.
         query_lower = query.lower()
-        for word in place_keywords:
-            if word in query_lower:
+        words = WORD_RE.findall(query_lower)
+        for word, nextWord in zip(words, words[1:] + [""]):
+            pair = word + " " + nextWord
+            if pair in PLACE_KEYWORDS:
+                return pair
+            if word in PLACE_KEYWORDS:
                 return word
         # fallback: extract last word
-        words = re.findall(r"\w+", query_lower)
         return words[-1] if words else query_lower.strip()
 
     def getPlaces(self, query: str, city: str, limit: int = 5) -> str:
+        text, _ = self.getPlacesStructured(query, city, limit)
+        return text
+
+    def getPlacesStructured(self, query: str, city: str, limit: int = 5) -> (str, list):
+        # Returns the chat reply together with the name/address/rating items it was built from.
         if not query or not city:
-            return "Please specify both the type of place and the city."
+            return "Please specify both the type of place and the city.", []
         place_type = self.normalizePlaceType(query)
         fullQuery = f"{place_type} in {city}"
         params = {
             "query": fullQuery,
             "key": self.apiKey
         }
-        response = requests.get(self.baseUrl, params=params)
+        response = self.session.get(self.baseUrl, params=params)
         if response.status_code != 200:
-            logging.error("Places API request failed.")
-            return "I'm sorry, I couldn't retrieve places at the moment."
+            logger.error("Places API request failed.")
+            return "I'm sorry, I couldn't retrieve places at the moment.", []
 
-        data = response.json()
+        data = orjson.loads(response.content)
         results = data.get('results', [])
         if not results:
             return (
                 f"Sorry, I couldn't find any {place_type} in {city}.\n"
                 f"Try a more common place type like 'restaurants', 'parks', or 'museums'."
-            )
+            ), []
 
         # Improved user-facing message
         if place_type.endswith('s'):
             responseLines = [f"Here are some recommended {place_type} in {city}:"]
         else:
             responseLines = [f"Here are some recommended {place_type}s in {city}:"]
+        items = []
         for place in results[:limit]:
             name = place.get('name', 'Unnamed Place')
             address = place.get('formatted_address', 'No address')
-            rating = place.get('rating', 'N/A')
+            rating = str(place.get('rating', 'N/A'))
+            items.append({"name": name, "address": address, "rating": rating})
             responseLines.append(f"{name} - {address} (Rating: {rating})")
 
-        return "\n".join(responseLines)
+        return "\n".join(responseLines), items
@@ -1,24 +1,45 @@
-import requests
+import asyncio
+import aiohttp
 import logging
+import orjson
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+logger = logging.getLogger(__name__)
 
 class TelegramBot:
+    connectRetries = 3
+
     def __init__(self, token: str):
         self.token = token
         self.baseUrl = f"https://api.telegram.org/bot{token}"
-        logging.info("TelegramBot initialized.")
+        self.session = None
+        logger.info("TelegramBot initialized.")
+
+    def getSession(self) -> aiohttp.ClientSession:
+        # A single session is shared by every call so connections to api.telegram.org are reused.
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=64, keepalive_timeout=60, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=5))
+        return self.session
 
-    def sendMessage(self, chatId: int, text: str, reply_markup=None) -> dict:
-        logging.info(f"Sending message to chat_id {chatId}")
+    async def sendMessage(self, chatId: int, text: str, reply_markup=None) -> dict:
+        logger.debug("Sending message to chat_id %s", chatId)
         url = f"{self.baseUrl}/sendMessage"
         payload = {"chat_id": chatId, "text": text}
         if reply_markup:
             payload["reply_markup"] = reply_markup
-        response = requests.post(url, json=payload)
-        logging.info("Message sent.")
-        return response.json()
+        for attempt in range(self.connectRetries):
+            try:
+                async with self.getSession().post(url, json=payload) as response:
+                    data = orjson.loads(await response.read())
+                break
+            except aiohttp.ClientConnectorError:
+                # Only connection failures are retried: the request never reached Telegram, so no duplicate message.
+                if attempt == self.connectRetries - 1:
+                    raise
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        logger.debug("Message sent.")
+        return data
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
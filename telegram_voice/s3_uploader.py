@@ -1,6 +1,14 @@
 import boto3
 import os
 import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def getS3Client():
+    # Building a client loads the botocore service model; do it once and share it (boto3 clients are thread-safe).
+    return boto3.client('s3', region_name="eu-north-1")
 
 class S3Uploader:
     @staticmethod
@@ -9,12 +17,12 @@ class S3Uploader:
         if objectName is None:
             objectName = os.path.basename(filePath)
         try:
-            s3Client = boto3.client('s3', region_name="eu-north-1")
+            s3Client = getS3Client()
             s3Client.upload_file(filePath, bucketName, objectName)
             url = s3Client.generate_presigned_url('get_object',
                                                    Params={'Bucket': bucketName, 'Key': objectName},
                                                    ExpiresIn=3600)
             return url
         except Exception as e:
-            logging.error(f"Exception in uploadFileToS3: {e}")
+            logger.error("Exception in uploadFileToS3: %s", e)
             return ""
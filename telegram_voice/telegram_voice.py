@@ -1,227 +1,321 @@
 import boto3
+import hashlib
+import random
 import requests
+import io
 import logging
-import os
-import subprocess
+import orjson
+import re
+import threading
 import time
-import json
+import uuid
+import wave
 import asyncio
 import aiohttp
+from botocore.exceptions import ClientError
+from functools import lru_cache
 from google.cloud import dialogflow_v2 as dialogflow
-from google.protobuf.json_format import MessageToDict
+from dialogflow_handler import queryResultToDict, IntentCache, ERROR_REPLY_RE, INTENT_CACHE_TTL, UNHANDLED_TEXT
+
+logger = logging.getLogger(__name__)
+
+# Answers to a repeated spoken question are reused for a minute, the shortest fulfillment TTL, so they do not go stale.
+VOICE_RESPONSE_TTL = 60
+TRANSCRIPT_WORD_RE = re.compile(r"\w+")
+# A voice note transcribes in seconds; a job still running after this long is abandoned instead of blocking a worker.
+TRANSCRIBE_TIMEOUT = 120
+# Transcribe jobs allowed to run at once from this process, and retries when the account-wide job limit is hit.
+TRANSCRIBE_CONCURRENCY = 5
+TRANSCRIBE_START_RETRIES = 6
+# Polly output, and how many synthesized replies are kept in memory (fallback and help texts repeat constantly).
+POLLY_VOICE = 'Joanna'
+POLLY_FORMAT = 'mp3'
+SPEECH_CACHE_SIZE = 128
+# Transcribe input: 16 kHz mono 16-bit PCM.
+WAV_SAMPLE_RATE = 16000
+
+def normalizeTranscript(transcript: str) -> str:
+    # Transcribe varies case and punctuation between takes of the same question.
+    return " ".join(TRANSCRIPT_WORD_RE.findall(transcript.lower()))
+
+@lru_cache(maxsize=1)
+def getSessionsClient() -> dialogflow.SessionsClient:
+    # One gRPC channel for every voice query instead of a new handshake per transcript.
+    return dialogflow.SessionsClient()
+
+@lru_cache(maxsize=8192)
+def sessionPath(projectId: str, sessionId: str) -> str:
+    return f"projects/{projectId}/agent/sessions/{sessionId}"
 
 def detectIntent(projectId, sessionId, text, languageCode='en'):
-    sessionClient = dialogflow.SessionsClient()
-    session = sessionClient.session_path(projectId, sessionId)
+    sessionClient = getSessionsClient()
+    session = sessionPath(projectId, sessionId)
     textInput = dialogflow.TextInput(text=text, language_code=languageCode)
     queryInput = dialogflow.QueryInput(text=textInput)
     response = sessionClient.detect_intent(request={"session": session, "query_input": queryInput})
-    responseDict = MessageToDict(response._pb, preserving_proto_field_name=True)
-    queryResult = responseDict.get("query_result", {})
-    return {
-        "intent": {"displayName": queryResult.get("intent", {}).get("display_name", "")},
-        "parameters": queryResult.get("parameters", {}),
-        "fulfillmentText": queryResult.get("fulfillment_text", ""),
-        "fulfillmentMessages": queryResult.get("fulfillment_messages", [])
-    }
+    return queryResultToDict(response._pb.query_result)
 
 class TelegramVoiceChannel:
-    def __init__(self, token: str, s3BucketName: str = None):
+    def __init__(self, token: str, s3BucketName: str = None, transcribeConcurrency: int = TRANSCRIBE_CONCURRENCY):
         self.token = token
         self.baseUrl = f"https://api.telegram.org/bot{token}"
         self.s3BucketName = s3BucketName
+        # Keyed per chat so one chat's answers are never served to another.
+        self.responseCache = IntentCache(VOICE_RESPONSE_TTL)
+        # boto3 clients are thread-safe but slow to build (service model, signer, endpoint), so each is built once.
+        self.awsClients = {}
+        self.awsClientsLock = threading.Lock()
+        # uploadAndTranscribe runs on worker threads, so the job gate is a thread semaphore.
+        self.transcribeSlots = threading.BoundedSemaphore(transcribeConcurrency)
+        self.speechCache = IntentCache(None, SPEECH_CACHE_SIZE)
+        # Transcript downloads and sendAudio run on worker threads; one pooled session keeps their connections alive.
+        self.httpSession = requests.Session()
+        self.httpSession.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=8))
+        self.session = None
+
+    def getSession(self) -> aiohttp.ClientSession:
+        # getFile and the voice download share one session, so both reuse the connection to api.telegram.org.
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=20, keepalive_timeout=60, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
 
     async def getFileDownloadUrl(self, fileId: str) -> str:
         url = f"{self.baseUrl}/getFile"
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json={"file_id": fileId}) as response:
-                data = await response.json()
+        async with self.getSession().post(url, json={"file_id": fileId}) as response:
+            data = await response.json()
         if data.get("ok"):
             filePath = data["result"]["file_path"]
-            logging.info(f"Obtained file path: {filePath}")
+            logger.info("Obtained file path: %s", filePath)
             return f"https://api.telegram.org/file/bot{self.token}/{filePath}"
-        logging.error("Failed to get file info from Telegram.")
+        logger.error("Failed to get file info from Telegram.")
         return ""
 
     @staticmethod
-    def convertOggToWav(inputFile: str, outputFile: str) -> bool:
-        # Convert an OGG audio file to WAV format using ffmpeg. Synchronous. (TODO: Consider async version if needed.)
-        command = ["ffmpeg", "-y", "-f", "ogg", "-i", inputFile, "-ar", "16000", "-ac", "1", outputFile]
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if result.returncode != 0:
-            logging.error(f"ffmpeg error: {result.stderr}")
-            return False
-        logging.info("ffmpeg conversion succeeded.")
-        return True
+    async def convertOggToWav(oggAudio: bytes) -> bytes:
+        # Convert OGG audio to WAV through ffmpeg's pipes, without temporary files. Returns b"" on failure.
+        # ffmpeg emits raw PCM (a WAV header written to a pipe has no sizes) and the header is added here.
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-f", "ogg", "-i", "pipe:0", "-ar", str(WAV_SAMPLE_RATE), "-ac", "1", "-f", "s16le", "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        pcm, errors = await process.communicate(oggAudio)
+        if process.returncode != 0:
+            logger.error("ffmpeg error: %s", errors.decode(errors="replace"))
+            return b""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wavFile:
+            wavFile.setnchannels(1)
+            wavFile.setsampwidth(2)
+            wavFile.setframerate(WAV_SAMPLE_RATE)
+            wavFile.writeframes(pcm)
+        logger.info("ffmpeg conversion succeeded.")
+        return buffer.getvalue()
 
-    def uploadFileToS3(self, localFile: str, s3Key: str, bucketName: str, s3Client) -> bool:
-        # Upload a file to S3 bucket. Synchronous. (TODO: Consider async version if needed.)
+    def uploadFileToS3(self, localFile, s3Key: str, bucketName: str, s3Client) -> bool:
+        # Upload a file path, or audio already in memory as bytes, to S3 bucket. Synchronous.
         try:
-            s3Client.upload_file(localFile, bucketName, s3Key)
-            logging.info(f"Uploaded {localFile} to bucket {bucketName} with key {s3Key}.")
+            if isinstance(localFile, bytes):
+                s3Client.put_object(Bucket=bucketName, Key=s3Key, Body=localFile)
+            else:
+                s3Client.upload_file(localFile, bucketName, s3Key)
+            logger.info("Uploaded to bucket %s with key %s.", bucketName, s3Key)
             return True
         except Exception as e:
-            logging.error(f"S3 upload error: {e}")
+            logger.error("S3 upload error: %s", e)
             return False
 
     def startTranscriptionJob(self, s3Client, transcribeClient, bucketName: str, s3Key: str) -> (str, dict):
-        jobName = f"transcribe_{int(time.time())}"
-        logging.info(f"Starting transcription job: {jobName}")
-        transcribeClient.start_transcription_job(
-            TranscriptionJobName=jobName,
-            Media={'MediaFileUri': f"s3://{bucketName}/{s3Key}"},
-            MediaFormat='wav',
-            LanguageCode='en-US'
-        )
+        # Unique per message: voice workers can start jobs in the same second.
+        jobName = f"transcribe_{uuid.uuid4().hex}"
+        logger.info("Starting transcription job: %s", jobName)
+        for attempt in range(TRANSCRIBE_START_RETRIES):
+            try:
+                transcribeClient.start_transcription_job(
+                    TranscriptionJobName=jobName,
+                    Media={'MediaFileUri': f"s3://{bucketName}/{s3Key}"},
+                    MediaFormat='wav',
+                    LanguageCode='en-US'
+                )
+                break
+            except ClientError as e:
+                # Too many jobs running account-wide: back off with jitter and try again.
+                if e.response.get("Error", {}).get("Code") != "LimitExceededException" or attempt == TRANSCRIBE_START_RETRIES - 1:
+                    raise
+                logger.warning("Transcribe job limit reached; retrying %s.", jobName)
+                time.sleep(min(30, 2 ** attempt) + random.random())
         return jobName, transcribeClient.get_transcription_job(TranscriptionJobName=jobName)
 
     def waitForTranscription(self, transcribeClient, jobName: str) -> dict:
-        delay = 1
+        # Short clips usually finish within a few seconds, so polling starts fast and backs off.
+        delay = 0.5
         max_delay = 5
+        deadline = time.monotonic() + TRANSCRIBE_TIMEOUT
         while True:
             status = transcribeClient.get_transcription_job(TranscriptionJobName=jobName)
             jobStatus = status['TranscriptionJob']['TranscriptionJobStatus']
-            logging.info(f"Job {jobName} status: {jobStatus}")
+            logger.debug("Job %s status: %s", jobName, jobStatus)
             if jobStatus in ['COMPLETED', 'FAILED']:
                 return status
+            if time.monotonic() >= deadline:
+                raise Exception(f"Transcription job {jobName} timed out.")
             time.sleep(delay)
             delay = min(delay * 2, max_delay)
 
     def getTranscribedText(self, status: dict) -> str:
         if status['TranscriptionJob']['TranscriptionJobStatus'] == 'COMPLETED':
             transcriptUri = status['TranscriptionJob']['Transcript']['TranscriptFileUri']
-            transcriptRes = requests.get(transcriptUri)
-            text = transcriptRes.json()['results']['transcripts'][0]['transcript']
-            logging.info(f"Transcribed text: {text.strip()}")
+            transcriptRes = self.httpSession.get(transcriptUri)
+            text = orjson.loads(transcriptRes.content)['results']['transcripts'][0]['transcript']
+            logger.info("Transcribed text: %s", text.strip())
             return text.strip()
         raise Exception("Transcription failed.")
 
-    def synthesizeSpeech(self, text: str, s3Client, bucketName: str, config: dict) -> (str, str):
-        """Synthesize speech from text using AWS Polly and upload to S3. Synchronous. (TODO: Consider async version if needed.)"""
-        pollyClient = boto3.client(
-            'polly',
-            aws_access_key_id=config["AWS_ACCESS_KEY_ID"],
-            aws_secret_access_key=config["AWS_SECRET_ACCESS_KEY"],
-            region_name=config["AWS_REGION"]
-        )
-        logging.info("Synthesizing speech with Polly.")
+    def synthesizeSpeech(self, text: str, config: dict) -> bytes:
+        """Synthesize speech from text using AWS Polly and return the MP3 bytes. Synchronous."""
+        # Polly bills per character, so replies that were already spoken are served from memory.
+        cacheKey = hashlib.sha256(f"{text}|{POLLY_VOICE}|{POLLY_FORMAT}".encode()).hexdigest()
+        audio = self.speechCache.get(cacheKey)
+        if audio is not None:
+            logger.info("Reusing synthesized speech.")
+            return audio
+        pollyClient = self.awsClient('polly', config)
+        logger.info("Synthesizing speech with Polly.")
         pollyRes = pollyClient.synthesize_speech(
-            Text=text, OutputFormat='mp3', VoiceId='Joanna'
+            Text=text, OutputFormat=POLLY_FORMAT, VoiceId=POLLY_VOICE
         )
-        outputAudioFile = "response_audio.mp3"
-        with open(outputAudioFile, 'wb') as file:
-            file.write(pollyRes['AudioStream'].read())
-        # Upload the synthesized audio to S3 and return the presigned URL
-        return self.uploadSynthesizedAudio(outputAudioFile, s3Client, bucketName)
-
-    def uploadSynthesizedAudio(self, audioFile: str, s3Client, bucketName: str) -> (str, str):
-        """Upload the synthesized audio file to S3 and return the file path and presigned URL. Synchronous. (TODO: Consider async version if needed.)"""
-        s3KeyOutput = "audio/response_audio.mp3"
-        if self.uploadFileToS3(audioFile, s3KeyOutput, bucketName, s3Client):
-            fileUrl = s3Client.generate_presigned_url(
-                'get_object', Params={'Bucket': bucketName, 'Key': s3KeyOutput}, ExpiresIn=3600
-            )
-            logging.info(f"Uploaded response audio. URL: {fileUrl}")
-            return audioFile, fileUrl
-        raise Exception("Failed to upload synthesized speech.")
+        audio = pollyRes['AudioStream'].read()
+        self.speechCache.set(cacheKey, audio)
+        return audio
 
-    async def downloadAndConvertVoice(self, message: dict) -> (str, str):
-        """Download a Telegram voice message and convert it to WAV format. Async."""
+    async def downloadAndConvertVoice(self, message: dict) -> bytes:
+        """Download a Telegram voice message and convert it to WAV audio in memory. Async."""
         fileId = message.get("voice", {}).get("file_id")
-        logging.info(f"Processing voice message. file_id: {fileId}")
+        logger.info("Processing voice message. file_id: %s", fileId)
         downloadUrl = await self.getFileDownloadUrl(fileId)
         if not downloadUrl:
             raise Exception("Failed to get download URL for voice message.")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(downloadUrl) as resp:
-                content = await resp.read()
-        localOggFile = "incoming_audio.ogg"
-        with open(localOggFile, "wb") as f:
-            f.write(content)
-        logging.info("Downloaded voice file.")
-        localWavFile = "incoming_audio.wav"
-        if not self.convertOggToWav(localOggFile, localWavFile):
+        async with self.getSession().get(downloadUrl) as resp:
+            content = await resp.read()
+        logger.info("Downloaded voice file.")
+        wavAudio = await self.convertOggToWav(content)
+        if not wavAudio:
             raise Exception("Conversion from OGG to WAV failed.")
-        logging.info("Converted to WAV format.")
-        return localOggFile, localWavFile
+        logger.info("Converted to WAV format.")
+        return wavAudio
+
+    def awsClient(self, service: str, config: dict):
+        """Return the shared boto3 client for a service, creating it on first use."""
+        key = (service, config["AWS_ACCESS_KEY_ID"], config["AWS_REGION"])
+        with self.awsClientsLock:
+            client = self.awsClients.get(key)
+            if client is None:
+                client = self.awsClients[key] = boto3.client(
+                    service,
+                    aws_access_key_id=config["AWS_ACCESS_KEY_ID"],
+                    aws_secret_access_key=config["AWS_SECRET_ACCESS_KEY"],
+                    region_name=config["AWS_REGION"]
+                )
+        return client
 
     def createS3Clients(self, config: dict) -> (object, object):
-        """Create boto3 S3 and Transcribe clients using the provided config."""
-        s3Client = boto3.client(
-            's3',
-            aws_access_key_id=config["AWS_ACCESS_KEY_ID"],
-            aws_secret_access_key=config["AWS_SECRET_ACCESS_KEY"],
-            region_name=config["AWS_REGION"]
-        )
-        transcribeClient = boto3.client(
-            'transcribe',
-            aws_access_key_id=config["AWS_ACCESS_KEY_ID"],
-            aws_secret_access_key=config["AWS_SECRET_ACCESS_KEY"],
-            region_name=config["AWS_REGION"]
-        )
-        return s3Client, transcribeClient
+        """Return the boto3 S3 and Transcribe clients for the provided config."""
+        return self.awsClient('s3', config), self.awsClient('transcribe', config)
 
-    def uploadAndTranscribe(self, s3Client, transcribeClient, config: dict, localWavFile: str) -> str:
-        # Upload WAV file to S3 and transcribe it using AWS Transcribe.
+    def uploadAndTranscribe(self, s3Client, transcribeClient, config: dict, wavAudio: bytes) -> str:
+        # Upload WAV audio to S3 and transcribe it using AWS Transcribe.
         bucketName = config["S3_BUCKET_NAME"]
-        s3Key = "audio/incoming_audio.wav"
-        if not self.uploadFileToS3(localWavFile, s3Key, bucketName, s3Client):
+        # A key per message, so concurrent voice workers never transcribe each other's audio.
+        s3Key = f"audio/incoming/{uuid.uuid4().hex}.wav"
+        if not self.uploadFileToS3(wavAudio, s3Key, bucketName, s3Client):
             raise Exception("WAV upload failed.")
-        jobName, _ = self.startTranscriptionJob(s3Client, transcribeClient, bucketName, s3Key)
-        status = self.waitForTranscription(transcribeClient, jobName)
-        return self.getTranscribedText(status)
+        jobName = None
+        try:
+            with self.transcribeSlots:
+                jobName, _ = self.startTranscriptionJob(s3Client, transcribeClient, bucketName, s3Key)
+                status = self.waitForTranscription(transcribeClient, jobName)
+            return self.getTranscribedText(status)
+        finally:
+            self.cleanupTranscription(s3Client, transcribeClient, bucketName, s3Key, jobName)
+
+    def cleanupTranscription(self, s3Client, transcribeClient, bucketName: str, s3Key: str, jobName: str = None) -> None:
+        # The recording and the job are only needed until the transcript is read; don't keep users' voice notes.
+        try:
+            s3Client.delete_object(Bucket=bucketName, Key=s3Key)
+        except Exception as e:
+            logger.warning("Could not delete %s from S3: %s", s3Key, e)
+        if jobName is None:
+            return
+        try:
+            transcribeClient.delete_transcription_job(TranscriptionJobName=jobName)
+        except Exception as e:
+            logger.warning("Could not delete transcription job %s: %s", jobName, e)
 
     def getResponseText(self, message: dict, transcript: str, projectId, dialogflowHandler) -> str:
         # Get response text from Dialogflow or use a fallback if Dialogflow is not available.
         if dialogflowHandler is not None and projectId:
             chatId = str(message.get("chat", {}).get("id"))
+            cacheKey = (chatId, normalizeTranscript(transcript))
+            cached = self.responseCache.get(cacheKey)
+            if cached is not None:
+                logger.info("Reusing the response to a repeated voice question.")
+                return cached
             queryResult = detectIntent(projectId, chatId, transcript)
-            logging.info(f"Dialogflow queryResult: {json.dumps(queryResult, indent=2)}")
+            logger.debug("Dialogflow queryResult: %s", queryResult)
             responseDf = dialogflowHandler.processRequest({"queryResult": queryResult})
             responseText = responseDf.get("fulfillmentText", "")
             if not responseText:
-                logging.warning("Empty fulfillmentText from Dialogflow; using fallback.")
-                responseText = "I'm sorry, I didn't understand that request."
+                logger.warning("Empty fulfillmentText from Dialogflow; using fallback.")
+                responseText = UNHANDLED_TEXT
+            elif self.isCacheableResponse(queryResult, responseText):
+                self.responseCache.set(cacheKey, responseText)
         else:
             responseText = "You said: " + transcript
         return responseText
 
-    def synthesizeAndSendResponse(self, message: dict, responseText: str, s3Client, config: dict) -> None:
-        # Synthesize a response, upload to S3, and send as audio to the Telegram chat.
-        bucketName = config["S3_BUCKET_NAME"]
-        _, fileUrl = self.synthesizeSpeech(responseText, s3Client, bucketName, config)
-        sendUrl = f"{self.baseUrl}/sendAudio"
-        data = {"chat_id": message.get("chat", {}).get("id"), "audio": fileUrl}
-        requests.post(sendUrl, data=data)
-        logging.info("Sent audio response to Telegram.")
+    @staticmethod
+    def isCacheableResponse(queryResult: dict, responseText: str) -> bool:
+        # A cache hit skips detectIntent, so the session's contexts do not advance; only the lookup
+        # intents DialogflowHandler caches itself are reused, and never the fallback or an error.
+        intentName = queryResult.get("intent", {}).get("displayName")
+        return (intentName in INTENT_CACHE_TTL and responseText != UNHANDLED_TEXT
+                and not ERROR_REPLY_RE.match(responseText))
 
-    def cleanupVoiceFiles(self, localOggFile: str, localWavFile: str) -> None:
-        # Remove temporary audio files from the local filesystem.
-        os.remove(localOggFile)
-        os.remove(localWavFile)
-        os.remove("response_audio.mp3")
-        logging.info("Cleaned up temporary files.")
+    def synthesizeAndSendResponse(self, message: dict, responseText: str, config: dict) -> None:
+        # Synthesize a response and upload the MP3 straight to the Telegram chat; no disk file or S3 round-trip.
+        audio = self.synthesizeSpeech(responseText, config)
+        sendUrl = f"{self.baseUrl}/sendAudio"
+        data = {"chat_id": message.get("chat", {}).get("id")}
+        self.httpSession.post(sendUrl, data=data, files={"audio": ("response.mp3", audio, "audio/mpeg")})
+        logger.info("Sent audio response to Telegram.")
 
     async def handleVoiceMessage(self, message: dict, config: dict, projectId=None, dialogflowHandler=None) -> dict:
         # Main entry point for handling a Telegram voice message: download, transcribe, process, synthesize, and respond. Async.
         try:
-            localOgg, localWav = await self.downloadAndConvertVoice(message)
-            s3Client, transcribeClient = self.createS3Clients(config)
-            transcript = self.uploadAndTranscribe(s3Client, transcribeClient, config, localWav)
-            responseText = self.getResponseText(message, transcript, projectId, dialogflowHandler)
-            logging.info(f"Final response text: {responseText}")
-            self.synthesizeAndSendResponse(message, responseText, s3Client, config)
-            self.cleanupVoiceFiles(localOgg, localWav)
+            # Building the AWS clients does not depend on the audio, so it overlaps the download and conversion.
+            wavAudio, (s3Client, transcribeClient) = await asyncio.gather(
+                self.downloadAndConvertVoice(message),
+                asyncio.to_thread(self.createS3Clients, config)
+            )
+            # The AWS, Dialogflow and Telegram calls below block, so they run on a worker thread to keep the loop free.
+            transcript = await asyncio.to_thread(self.uploadAndTranscribe, s3Client, transcribeClient, config, wavAudio)
+            responseText = await asyncio.to_thread(self.getResponseText, message, transcript, projectId, dialogflowHandler)
+            logger.info("Final response text: %s", responseText)
+            await asyncio.to_thread(self.synthesizeAndSendResponse, message, responseText, config)
             return {"status": 0}
         except Exception as e:
-            logging.error(f"Error processing voice message: {e}")
+            logger.error("Error processing voice message: %s", e)
             return {"status": 1, "error": str(e)}
 
     async def processWebhook(self, requestData: dict, dialogflowHandler=None, config=None, projectId=None) -> dict:
         # Process an incoming Telegram webhook event. Async.
-        logging.info("Received Telegram webhook event.")
+        logger.info("Received Telegram webhook event.")
         message = requestData.get("message", {})
         if "voice" in message:
             return await self.handleVoiceMessage(message, config, projectId, dialogflowHandler)
-        logging.info("Processing non-voice message.")
+        logger.info("Processing non-voice message.")
         return {"status": 0}
@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from fastapi.testclient import TestClient
+import controller
+from controller import UpdateType, classifyUpdate
+
+CALLBACK_UPDATE = {"callback_query": {"message": {"chat": {"id": 1}}, "data": "/weather"}}
+DIALOGFLOW_UPDATE = {"queryResult": {"intent": {"display_name": "GetWeather"}}}
+VOICE_UPDATE = {"message": {"chat": {"id": 2}, "voice": {"file_id": "x"}}}
+AUDIO_UPDATE = {"message": {"chat": {"id": 3}, "audio": {"file_id": "y"}}}
+TEXT_UPDATE = {"message": {"chat": {"id": 4}, "text": "hi"}}
+UNKNOWN_UPDATE = {"message": {"chat": {"id": 5}, "sticker": {}}}
+
+@pytest.mark.parametrize("update, expected", [
+    (CALLBACK_UPDATE, UpdateType.CALLBACK),
+    (DIALOGFLOW_UPDATE, UpdateType.DIALOGFLOW),
+    (VOICE_UPDATE, UpdateType.VOICE),
+    (AUDIO_UPDATE, UpdateType.VOICE),
+    (TEXT_UPDATE, UpdateType.TEXT),
+    (UNKNOWN_UPDATE, UpdateType.NONE),
+    ({}, UpdateType.NONE),
+    # A callback wins over anything else in the update; voice wins over a caption-like text.
+    (dict(CALLBACK_UPDATE, message=TEXT_UPDATE["message"]), UpdateType.CALLBACK),
+    ({"message": {"voice": {}, "text": "caption"}}, UpdateType.VOICE),
+])
+def testClassifyUpdate(update, expected):
+    assert classifyUpdate(update, update.get("message") or {}) is expected
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    # Replace every webhook branch with a stub that records which one ran.
+    calls = []
+    async def callback(requestJson):
+        calls.append("callback")
+        return {"status": "ok"}
+    async def dialogflowRequest(requestJson):
+        calls.append("dialogflow")
+        return b'{"fulfillmentText":"ok"}'
+    def voice(message, chatId, requestJson):
+        calls.append(("voice", chatId))
+        return {"status": "queued"}
+    async def text(message, chatId):
+        calls.append(("text", chatId))
+        return {"status": "ok"}
+    monkeypatch.setattr(controller, "processCallbackQuery", callback)
+    monkeypatch.setattr(controller, "processDialogflowRequest", dialogflowRequest)
+    monkeypatch.setattr(controller, "handleVoiceMessage", voice)
+    monkeypatch.setattr(controller, "handleTextMessage", text)
+    return calls
+
+@pytest.mark.parametrize("update, expectedCall, expectedBody", [
+    (CALLBACK_UPDATE, "callback", {"status": "ok"}),
+    (DIALOGFLOW_UPDATE, "dialogflow", {"fulfillmentText": "ok"}),
+    (VOICE_UPDATE, ("voice", 2), {"status": "queued"}),
+    (AUDIO_UPDATE, ("voice", 3), {"status": "queued"}),
+    (TEXT_UPDATE, ("text", 4), {"status": "ok"}),
+])
+def testWebhookDispatch(dispatched, update, expectedCall, expectedBody):
+    response = TestClient(controller.app).post("/amit-bot", json=update)
+    assert response.status_code == 200
+    assert response.json() == expectedBody
+    assert dispatched == [expectedCall]
+
+def testWebhookIgnoresUnknownUpdates(dispatched):
+    response = TestClient(controller.app).post("/amit-bot", json=UNKNOWN_UPDATE)
+    assert response.json() == {"status": "no content"}
+    assert dispatched == []
+
+def testHandleVoiceMessageQueuesOrRejects(monkeypatch):
+    import asyncio
+    monkeypatch.setattr(controller.app.state, "voiceQueue", asyncio.Queue(maxsize=1), raising=False)
+    assert controller.handleVoiceMessage({}, 7, VOICE_UPDATE)["text"] == controller.VOICE_ACK_TEXT
+    assert controller.handleVoiceMessage({}, 7, VOICE_UPDATE)["text"] == controller.VOICE_BUSY_TEXT
+    assert controller.app.state.voiceQueue.get_nowait() is VOICE_UPDATE
+
+@pytest.fixture
+def freshConfig(monkeypatch, tmp_path):
+    # loadConfig is lru_cached; clear it around each case so no test sees another's config.
+    monkeypatch.chdir(tmp_path)
+    for key in controller.CONFIG_ENV_KEYS:
+        monkeypatch.delenv(key, raising=False)
+    controller.loadConfig.cache_clear()
+    yield tmp_path
+    controller.loadConfig.cache_clear()
+
+def testLoadConfigEnvOverridesFile(freshConfig, monkeypatch):
+    (freshConfig / "config.json").write_text('{"TELEGRAM_TOKEN": "file-token", "S3_REGION": "eu-central-1", "EXTRA": "kept"}')
+    monkeypatch.setenv("TELEGRAM_TOKEN", "env-token")
+    monkeypatch.setenv("VOICE_WORKERS", "3")
+    monkeypatch.setenv("S3_REGION", "")
+    monkeypatch.setenv("UNLISTED_KEY", "ignored")
+    config = controller.loadConfig()
+    assert config["TELEGRAM_TOKEN"] == "env-token"
+    assert config["VOICE_WORKERS"] == "3"
+    # Empty variables do not blank out the file, and only CONFIG_ENV_KEYS are read from the environment.
+    assert config["S3_REGION"] == "eu-central-1"
+    assert config["EXTRA"] == "kept"
+    assert "UNLISTED_KEY" not in config
+
+def testLoadConfigWithoutFile(freshConfig, monkeypatch):
+    monkeypatch.setenv("DIALOGFLOW_PROJECT_ID", "project")
+    assert dict(controller.loadConfig()) == {"DIALOGFLOW_PROJECT_ID": "project"}
+
+def testLoadConfigIsReadOnlyAndShared(freshConfig):
+    (freshConfig / "config.json").write_text('{"TELEGRAM_TOKEN": "file-token"}')
+    config = controller.loadConfig()
+    with pytest.raises(TypeError):
+        config["TELEGRAM_TOKEN"] = "changed"
+    assert controller.loadConfig() is config
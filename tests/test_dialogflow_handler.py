@@ -0,0 +1,178 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from unittest.mock import MagicMock
+from google.cloud.dialogflow_v2.types import QueryResult
+from google.protobuf.json_format import MessageToDict, ParseDict
+from dialogflow_handler import DialogflowHandler, IntentCache, UNHANDLED_TEXT, guessCityName, queryResultToDict, textReply
+
+def countingHandler(handler, intentName, reply="ok"):
+    # Replace one intent handler with a stub that records its calls.
+    calls = []
+    def fake(queryResult, parameters):
+        calls.append(queryResult.get("queryText"))
+        return textReply(reply)
+    handler.intentHandlers[intentName] = fake
+    return calls
+
+def request(intentName, queryText="", parameters=None):
+    return {"queryResult": {"intent": {"displayName": intentName}, "queryText": queryText, "parameters": parameters or {}}}
+
+def testIntentCacheExpires(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("dialogflow_handler.time.monotonic", lambda: clock[0])
+    cache = IntentCache(60)
+    cache.set("key", "value")
+    clock[0] = 159.0
+    assert cache.get("key") == "value"
+    clock[0] = 160.0
+    assert cache.get("key") is None
+    assert cache.entries == {}
+
+def testIntentCacheEvictsLeastRecentlyUsed():
+    cache = IntentCache(None, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def testProcessRequestCachesPerQueryText():
+    handler = DialogflowHandler(None, None, None, None)
+    calls = countingHandler(handler, "GetWeather")
+    parameters = {"geo-city": "Rome", "forecastPeriod": ""}
+    handler.processRequest(request("GetWeather", "weather in Rome", parameters))
+    handler.processRequest(request("GetWeather", "Weather in Rome ", parameters))
+    assert calls == ["weather in Rome"]
+    handler.processRequest(request("GetWeather", "weather in Rome tomorrow", parameters))
+    assert len(calls) == 2
+
+def testProcessRequestDoesNotCacheUnlistedIntents():
+    handler = DialogflowHandler(None, None, None, None)
+    calls = countingHandler(handler, "DefaultWelcomeIntent")
+    handler.processRequest(request("DefaultWelcomeIntent"))
+    handler.processRequest(request("DefaultWelcomeIntent"))
+    assert len(calls) == 2
+    assert "DefaultWelcomeIntent" not in handler.intentCaches
+    assert handler.processRequest(request("SmallTalk", "hi"))["fulfillmentText"] == UNHANDLED_TEXT
+    assert "SmallTalk" not in handler.intentCaches
+
+def testClearCache():
+    handler = DialogflowHandler(None, None, None, None)
+    weatherCalls = countingHandler(handler, "GetWeather")
+    placesCalls = countingHandler(handler, "GetPlaces")
+    for _ in range(2):
+        handler.processRequest(request("GetWeather", "weather in Rome"))
+        handler.processRequest(request("GetPlaces", "parks in Rome"))
+    assert len(weatherCalls) == 1 and len(placesCalls) == 1
+    handler.clearCache("GetWeather")
+    handler.processRequest(request("GetWeather", "weather in Rome"))
+    handler.processRequest(request("GetPlaces", "parks in Rome"))
+    assert len(weatherCalls) == 2 and len(placesCalls) == 1
+    handler.clearCache()
+    handler.processRequest(request("GetWeather", "weather in Rome"))
+    handler.processRequest(request("GetPlaces", "parks in Rome"))
+    assert len(weatherCalls) == 3 and len(placesCalls) == 2
+
+@pytest.mark.parametrize("reply", [
+    "Sorry, I couldn't find the specified location.",
+    "Sorry, I couldn't understand the forecast period. Please try 'tomorrow', 'hourly', 'in 3 days', etc.",
+    "Sorry, I couldn't retrieve current weather data for that location.",
+    "Sorry, I couldn't retrieve hourly forecast data.",
+    "Sorry, I couldn't retrieve hourly forecast data for that day.",
+    "Failed to fetch results. Status code: 503",
+    "Failed to fetch schedules. Status code: 500",
+    "Failed to retrieve results. Status code: 404",
+    "Error parsing results: syntax error",
+    "Error processing last game result: 'date'",
+])
+def testErrorRepliesAreNotCached(reply):
+    handler = DialogflowHandler(None, None, None, None)
+    calls = countingHandler(handler, "GetEuroleague", reply)
+    for _ in range(2):
+        assert handler.processRequest(request("GetEuroleague", "last game"))["fulfillmentText"] == reply
+    assert len(calls) == 2
+
+@pytest.mark.parametrize("reply", [
+    "No past played games found for Real Madrid in season E2024.",
+    "No upcoming games found for Real Madrid in season E2024.",
+    "Current weather in Rome: 21°C, clear sky.",
+])
+def testNormalRepliesAreCached(reply):
+    handler = DialogflowHandler(None, None, None, None)
+    calls = countingHandler(handler, "GetEuroleague", reply)
+    for _ in range(2):
+        assert handler.processRequest(request("GetEuroleague", "last game"))["fulfillmentText"] == reply
+    assert len(calls) == 1
+
+def testQueryResultToDictMatchesMessageToDict():
+    queryResult = ParseDict({
+        "queryText": "weather in Rome",
+        "fulfillmentText": "Hi",
+        "intent": {"displayName": "GetWeather"},
+        "parameters": {
+            "geo-city": "Rome", "empty": "", "missing": None, "flag": False, "days": 3, "ratio": 2.5,
+            "forecastPeriod": ["tomorrow", 1, None, {"unit": "day"}],
+            "nested": {"inner": {"values": [True, "x"]}, "blank": {}}
+        },
+        "fulfillmentMessages": [{"text": {"text": ["Hi"]}}, {"payload": {"telegram": {"text": "Welcome", "count": 1}}}]
+    }, QueryResult.pb()())
+    expected = MessageToDict(queryResult, preserving_proto_field_name=True)
+    result = queryResultToDict(queryResult)
+    assert result["intent"]["displayName"] == expected["intent"]["display_name"]
+    assert result["parameters"] == expected["parameters"]
+    assert result["fulfillmentText"] == expected["fulfillment_text"]
+    assert result["fulfillmentMessages"] == expected["fulfillment_messages"]
+    # An integral number must come back as the same type as MessageToDict gives, not just compare equal.
+    assert type(result["parameters"]["days"]) is type(expected["parameters"]["days"])
+
+def euroleagueRoute(queryText, dateTime=None):
+    # Which EuroleagueService call a team query with no game code or number ends up in.
+    service = MagicMock()
+    for method in ("getLastGameResult", "getNextGameFormatted", "getSeasonResults"):
+        getattr(service, method).return_value = method
+    handler = DialogflowHandler(None, None, service, None)
+    parameters = {"team": "Real Madrid", "euroSeason": "2024", "date-time": dateTime}
+    return handler.handleEuroleagueIntent({"queryText": queryText}, parameters)["fulfillmentText"]
+
+@pytest.mark.parametrize("queryText, route", [
+    ("Real Madrid last game", "getLastGameResult"),
+    ("What was the LATEST Real Madrid result?", "getLastGameResult"),
+    ("most recent game of Real Madrid", "getLastGameResult"),
+    ("Real Madrid next match", "getNextGameFormatted"),
+    ("when is the upcoming Real Madrid game", "getNextGameFormatted"),
+    ("Real Madrid's following game", "getNextGameFormatted"),
+])
+def testEuroleagueRoutesSynonyms(queryText, route):
+    assert euroleagueRoute(queryText, "2024-04-10") == route
+
+@pytest.mark.parametrize("queryText", [
+    "Real Madrid pasta night",            # "past"
+    "Real Madrid becoming champions",     # "coming"
+    "Real Madrid blasting everyone",      # "last"
+    "Real Madrid nextgen arena",          # "next"
+])
+def testEuroleagueIgnoresSynonymsInsideWords(queryText):
+    # With a date and no whole-word synonym the query is a season listing.
+    assert euroleagueRoute(queryText, "2024-04-10") == "getSeasonResults"
+
+def testEuroleagueDefaultsToLastGameWithoutDate():
+    assert euroleagueRoute("Real Madrid pasta night") == "getLastGameResult"
+
+@pytest.mark.parametrize("queryText, city", [
+    ("weather in rome", "rome"),
+    ("Weather IN London", "London"),
+    ("forecast at paris.", "paris"),
+    ("what's the weather for Madrid?!", "Madrid"),
+    ("Weather in Tel Aviv?", "Tel Aviv"),
+    ("weather for New York!!", "New York"),
+    # "in"/"at" ending another word is not a preposition; the last non-stopword is used instead.
+    ("Dublin weather", "Dublin"),
+    ("Berlin Paris", "Paris"),
+    ("great Istanbul weather", "Istanbul"),
+    ("what is the weather", None),
+])
+def testGuessCityName(queryText, city):
+    assert guessCityName(queryText) == city
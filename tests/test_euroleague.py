@@ -10,10 +10,11 @@ def mockResponse(text, status_code=200):
     mock = MagicMock()
     mock.status_code = status_code
     mock.text = text
+    mock.content = text.encode()
     return mock
 
 def testInitLogs():
-    with patch('logging.info') as log:
+    with patch('euroleague.logger.info') as log:
         EuroleagueService()
         log.assert_called()
 
@@ -48,13 +49,13 @@ def testFormatLastGame():
 def testGetLastGameResultSuccess(monkeypatch):
     service = EuroleagueService()
     xml = '<root><game><date>Apr 10, 2023</date><time>20:00</time><hometeam>A</hometeam><awayteam>B</awayteam><played>true</played></game></root>'
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse(xml))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
     s = service.getLastGameResult("2023", "A")
     assert "Last game for A" in s
 
 def testGetLastGameResultFail(monkeypatch):
     service = EuroleagueService()
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse('', 500))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse('', 500))
     s = service.getLastGameResult("2023", "A")
     assert s.startswith("Failed to fetch results")
 
@@ -73,31 +74,42 @@ def testFormatNextGame():
 def testGetNextGameSuccess(monkeypatch):
     service = EuroleagueService()
     xml = '<root><item><date>Apr 20, 2025</date><startime>20:00</startime><hometeam>A</hometeam><awayteam>B</awayteam></item></root>'
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse(xml))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
     s = service.getNextGame("2025", "A")
     assert "Next game for A" in s or "No upcoming games found" in s
 
 def testGetNextGameFail(monkeypatch):
     service = EuroleagueService()
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse('', 500))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse('', 500))
     s = service.getNextGame("2025", "A")
     assert s.startswith("Failed to fetch schedules")
 
 def testGetNextGameFormatted(monkeypatch):
     service = EuroleagueService()
     xml = '<root><item><date>Apr 20, 2025</date><startime>20:00</startime><hometeam>A</hometeam><awayteam>B</awayteam></item></root>'
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse(xml))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
     s = service.getNextGameFormatted("2025", "A")
     assert "Next game for A" in s or "No upcoming games found" in s
 
 def testGetSeasonResults(monkeypatch):
     service = EuroleagueService()
     xml = '<root><game><date>Apr 10, 2023</date><time>20:00</time><hometeam>A</hometeam><awayteam>B</awayteam><played>true</played></game></root>'
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse(xml))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
     s = service.getSeasonResults("2023", "A")
     # Accept the expected format as valid output (date and teams)
     assert ("Apr 10, 2023" in s and "A" in s and "B" in s) or "No games found" in s or "Failed to fetch results" in s
 
+def testGetSeasonResultsKeepsGamesWithoutTime(monkeypatch):
+    service = EuroleagueService()
+    xml = ('<root>'
+           '<game><date>Apr 10, 2023</date><time>TBD</time><hometeam>A</hometeam><awayteam>B</awayteam></game>'
+           '<game><date>Mar 02, 2023</date><time/><hometeam>C</hometeam><awayteam>A</awayteam></game>'
+           '<game><date>Jan 05, 2023</date><hometeam>A</hometeam><awayteam>D</awayteam></game>'
+           '</root>')
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
+    lines = service.getSeasonResults("2023", "A").split("\n")
+    assert [line.split(":")[0] for line in lines] == ["Jan 05, 2023", "Mar 02, 2023", "Apr 10, 2023"]
+
 def testFormatNextGameFormatted():
     service = EuroleagueService()
     d = {"date": "Apr 10, 2023", "startime": "20:00", "hometeam": "A", "awayteam": "B", "arenaname": "Arena"}
@@ -141,7 +153,7 @@ def testFormatResults():
 def testGetResults(monkeypatch):
     service = EuroleagueService()
     xml = '<root><gameResults><round>1</round><gameday>1</gameday><date>Apr 10, 2023</date><time>20:00</time><homeTeam>A</homeTeam><homescore>90</homescore><awayTeam>B</awayTeam><awayscore>80</awayscore></gameResults></root>'
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse(xml))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
     s = service.getResults("2023", 1)
     assert "Results:" in s or "Failed to retrieve results" in s
 
@@ -154,6 +166,161 @@ def testFormatScheduleItem():
 def testGetSchedules(monkeypatch):
     service = EuroleagueService()
     xml = '<root><item><game>1</game><gamecode>123</gamecode><date>Apr 10, 2023</date><startime>20:00</startime><hometeam>A</hometeam><awayteam>B</awayteam></item></root>'
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse(xml))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
     s = service.getSchedules("2023", 1, "A")
     assert "Game:" in s or "Failed to retrieve schedules" in s
+
+def testFetchXmlCachesSuccessfulResponses(monkeypatch):
+    service = EuroleagueService()
+    calls = []
+    xml = '<root><game><date>Apr 10, 2023</date><time>20:00</time><hometeam>A</hometeam><awayteam>B</awayteam><played>true</played></game></root>'
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: calls.append(k) or mockResponse(xml))
+    assert "Last game for A" in service.getLastGameResult("2023", "A")
+    assert "Last game for B" in service.getLastGameResult("2023", "B")
+    assert len(calls) == 1
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: calls.append(k) or mockResponse('', 500))
+    assert service.getLastGameResult("2024", "A").startswith("Failed to fetch results")
+    assert service.getLastGameResult("2024", "A").startswith("Failed to fetch results")
+    assert len(calls) == 3
+
+def testParsedFeedReusedAcrossTeams(monkeypatch):
+    service = EuroleagueService()
+    xml = '<root><game><date>Apr 10, 2023</date><time>20:00</time><hometeam>A</hometeam><awayteam>B</awayteam><played>true</played></game></root>'
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(xml))
+    parseCalls = []
+    parse = service.parseResultsXml
+    monkeypatch.setattr(service, 'parseResultsXml', lambda text: parseCalls.append(text) or parse(text))
+    service.getLastGameResult("2023", "A")
+    service.getLastGameResult("2023", "B")
+    assert len(parseCalls) == 1
+    service.xmlCache.clear()
+    service.getLastGameResult("2023", "A")
+    assert len(parseCalls) == 2
+
+def testGamesForTeam():
+    service = EuroleagueService()
+    games = [
+        {"hometeam": "Real Madrid", "awayteam": "FC Barcelona"},
+        {"hometeam": "Olympiacos", "awayteam": "Real Madrid"},
+        {"hometeam": "Panathinaikos", "awayteam": "Olympiacos"},
+        {"hometeam": "Real Betis", "awayteam": "Real Madrid"}
+    ]
+    assert service.gamesForTeam("results", "E2024", games, "Madrid") == [games[0], games[1], games[3]]
+    assert service.gamesForTeam("results", "E2024", games, "real") == [games[0], games[1], games[3]]
+    assert service.gamesForTeam("results", "E2024", games, "olympiacos") == [games[1], games[2]]
+    assert service.gamesForTeam("results", "E2024", games, "Maccabi") == []
+
+def testFilterPastGamesUsesGivenNow():
+    service = EuroleagueService()
+    from datetime import datetime
+    games = [{"hometeam": "A", "awayteam": "B", "played": "true", "datetime_obj": datetime(2024, 5, 1)}]
+    assert service.filterPastGames(games, "A", now=datetime(2024, 4, 30)) == []
+    assert service.filterPastGames(games, "A", now=datetime(2024, 5, 2)) == games
+
+def testParseGameDatetimeMatchesStrptime():
+    from datetime import datetime
+    from euroleague import parseGameDatetime
+    for dateStr, timeStr in [("Apr 10, 2023", "20:00"), ("Oct 3, 2024", "18:45"), ("Dec 31, 2024", "00:05")]:
+        assert parseGameDatetime(dateStr, timeStr) == datetime.strptime(dateStr + " " + timeStr, "%b %d, %Y %H:%M")
+    assert parseGameDatetime("Apr 10, 2023") == datetime(2023, 4, 10)
+    with pytest.raises(ValueError):
+        parseGameDatetime("N/A")
+
+def testParsedGamesCarryFoldedTeams():
+    service = EuroleagueService()
+    xml = '<root><game><date>Apr 10, 2023</date><time>20:00</time><hometeam>Real Madrid</hometeam><awayteam>Olympiacos</awayteam><played>true</played></game></root>'
+    games = service.parseResultsXml(xml)
+    assert games[0]['teams_folded'] == ('real madrid', 'olympiacos')
+    assert service.filterPastGames(games, "Olympiacos") == games
+    assert service.filterPastGames(games, "madrid olympiacos") == []
+
+def testParseScheduleXmlKeepsOnlyUsedFields():
+    service = EuroleagueService()
+    xml = '<root><item><date>Apr 11, 2023</date><startime>21:00</startime><hometeam>X</hometeam><awayteam>Y</awayteam><homecode>XX</homecode><arenaname>Hall</arenaname></item></root>'
+    item = service.parseScheduleXml(xml)[0]
+    assert item['arenaname'] == 'Hall'
+    assert 'homecode' not in item
+
+def testFetchXmlSharesConcurrentDownloads(monkeypatch):
+    import threading
+    service = EuroleagueService()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    def slowGet(*args, **kwargs):
+        calls.append(1)
+        started.set()
+        assert release.wait(2)
+        return mockResponse('<root/>')
+    monkeypatch.setattr('requests.Session.get', slowGet)
+    class CountingEvent:
+        # Counts the threads that reach the wait for the shared download.
+        def __init__(self, event):
+            self.event = event
+            self.waiting = threading.Semaphore(0)
+        def wait(self, timeout=None):
+            self.waiting.release()
+            return self.event.wait(timeout)
+        def set(self):
+            self.event.set()
+    results = []
+    fetch = lambda: results.append(service.fetchXml(service.baseUrlResults, {"seasonCode": "E2024"}, 60))
+    leader = threading.Thread(target=fetch)
+    leader.start()
+    assert started.wait(2)
+    (pending,) = service.inflight.values()
+    done = pending["done"] = CountingEvent(pending["done"])
+    waiters = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in waiters:
+        thread.start()
+    for _ in waiters:
+        assert done.waiting.acquire(timeout=2)
+    # Every waiter is parked on the leader's download, which has not finished or filled the cache yet.
+    assert len(calls) == 1 and service.xmlCache == {}
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 5 and all(status == 200 for status, _ in results)
+    assert service.inflight == {}
+
+def testDownloadXmlEvictsSafelyFromSeveralThreads(monkeypatch):
+    import threading
+    import euroleague
+    monkeypatch.setattr(euroleague, "XML_CACHE_SIZE", 4)
+    service = EuroleagueService()
+    for season in range(4):
+        service.xmlCache[(service.baseUrlResults, (("seasonCode", f"E{season}"),))] = (0, b"<root/>")
+    threadCount = 8
+    barrier = threading.Barrier(threadCount)
+    def get(*args, **kwargs):
+        # Every thread reaches the full cache at the same moment.
+        barrier.wait(2)
+        return mockResponse('<root/>')
+    monkeypatch.setattr('requests.Session.get', get)
+    errors = []
+    def download(season):
+        try:
+            params = {"seasonCode": f"F{season}"}
+            service.downloadXml(service.baseUrlResults, params, (service.baseUrlResults, tuple(params.items())))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=download, args=(season,)) for season in range(threadCount)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(service.xmlCache) == 4
+    assert service.cacheMisses == threadCount
+
+def testParsedCachesAreBounded(monkeypatch):
+    import euroleague
+    monkeypatch.setattr(euroleague, "PARSED_CACHE_SIZE", 2)
+    service = EuroleagueService()
+    xml = b'<root><game><date>Apr 10, 2023</date><time>20:00</time><hometeam>A</hometeam><awayteam>B</awayteam></game></root>'
+    for season in ("E2021", "E2022", "E2023"):
+        games = service.parsedFeed("results", season, xml, service.parseResultsXml)
+        assert len(service.gamesForTeam("results", season, games, "A")) == 1
+    assert list(service.parsedCache) == [("results", "E2022"), ("results", "E2023")]
+    assert list(service.teamIndexCache) == [("results", "E2022"), ("results", "E2023")]
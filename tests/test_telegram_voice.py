@@ -5,12 +5,11 @@ import pytest
 import types
 from unittest.mock import MagicMock, patch, AsyncMock
 from telegram_voice.telegram_voice import TelegramVoiceChannel
+from dialogflow_handler import DialogflowHandler, UNHANDLED_TEXT
 
 class MockS3Client:
     def upload_file(self, localFile, bucketName, s3Key):
         pass
-    def generate_presigned_url(self, *args, **kwargs):
-        return "https://dummy-s3-url"
 
 class MockTranscribeClient:
     def start_transcription_job(self, **kwargs):
@@ -28,6 +27,17 @@ async def testGetFileDownloadUrl(monkeypatch):
     with patch("aiohttp.ClientSession.post", return_value=sessionCtx):
         url = await channel.getFileDownloadUrl("fileid")
         assert url.endswith("voice.ogg")
+    await channel.close()
+
+@pytest.mark.asyncio
+async def testGetSessionIsShared():
+    channel = TelegramVoiceChannel(token="dummy")
+    session = channel.getSession()
+    assert channel.getSession() is session
+    await channel.close()
+    assert session.closed
+    assert channel.getSession() is not session
+    await channel.close()
 
 @pytest.mark.asyncio
 async def testDownloadAndConvertVoice(monkeypatch):
@@ -38,24 +48,40 @@ async def testDownloadAndConvertVoice(monkeypatch):
     sessionCtx = AsyncMock()
     sessionCtx.__aenter__.return_value.read = AsyncMock(return_value=b"dummy")
     with patch("aiohttp.ClientSession.get", return_value=sessionCtx):
-        with patch("builtins.open", MagicMock()):
-            monkeypatch.setattr(channel, "convertOggToWav", lambda *a, **k: True)
-            ogg, wav = await channel.downloadAndConvertVoice({"voice": {"file_id": "dummy"}})
-            assert ogg == "incoming_audio.ogg"
-            assert wav == "incoming_audio.wav"
+        convert = AsyncMock(return_value=b"wav")
+        monkeypatch.setattr(channel, "convertOggToWav", convert)
+        wav = await channel.downloadAndConvertVoice({"voice": {"file_id": "dummy"}})
+        assert wav == b"wav"
+        convert.assert_awaited_once_with(b"dummy")
+    await channel.close()
 
-def testConvertOggToWav(monkeypatch):
+def fakeFfmpeg(returncode, stdout=b"", stderr=b""):
+    process = types.SimpleNamespace(returncode=returncode, communicate=AsyncMock(return_value=(stdout, stderr)))
+    return AsyncMock(return_value=process)
+
+@pytest.mark.asyncio
+async def testConvertOggToWav(monkeypatch):
+    import io
+    import wave
     channel = TelegramVoiceChannel(token="dummy")
-    monkeypatch.setattr("subprocess.run", lambda *a, **k: types.SimpleNamespace(returncode=0, stderr=""))
-    assert channel.convertOggToWav("in.ogg", "out.wav") is True
-    monkeypatch.setattr("subprocess.run", lambda *a, **k: types.SimpleNamespace(returncode=1, stderr="fail"))
-    assert channel.convertOggToWav("in.ogg", "out.wav") is False
+    monkeypatch.setattr("asyncio.create_subprocess_exec", fakeFfmpeg(0, b"\x00\x01" * 160))
+    wav = await channel.convertOggToWav(b"ogg")
+    with wave.open(io.BytesIO(wav)) as wavFile:
+        assert (wavFile.getnchannels(), wavFile.getframerate(), wavFile.getnframes()) == (1, 16000, 160)
+    monkeypatch.setattr("asyncio.create_subprocess_exec", fakeFfmpeg(1, stderr=b"fail"))
+    assert await channel.convertOggToWav(b"ogg") == b""
 
 def testUploadFileToS3():
     channel = TelegramVoiceChannel(token="dummy")
     client = MockS3Client()
     assert channel.uploadFileToS3("file", "key", "bucket", client) is True
 
+def testUploadBytesToS3():
+    channel = TelegramVoiceChannel(token="dummy")
+    client = MagicMock()
+    assert channel.uploadFileToS3(b"wav", "key", "bucket", client) is True
+    client.put_object.assert_called_once_with(Bucket="bucket", Key="key", Body=b"wav")
+
 def testUploadFileToS3Error(monkeypatch):
     channel = TelegramVoiceChannel(token="dummy")
     class BadS3:
@@ -69,32 +95,44 @@ def testCreateS3Clients(monkeypatch):
     assert isinstance(s3, MockS3Client)
     assert isinstance(transcribe, MockS3Client)
 
+def testCreateS3ClientsReusesClients(monkeypatch):
+    channel = TelegramVoiceChannel(token="dummy")
+    built = []
+    monkeypatch.setattr("boto3.client", lambda service, **k: built.append(service) or MockS3Client())
+    config = {"AWS_ACCESS_KEY_ID": "a", "AWS_SECRET_ACCESS_KEY": "b", "AWS_REGION": "us"}
+    first = channel.createS3Clients(config)
+    assert channel.createS3Clients(config) == first
+    assert built == ["s3", "transcribe"]
+
 def testSynthesizeSpeech(monkeypatch):
     channel = TelegramVoiceChannel(token="dummy")
     monkeypatch.setattr("boto3.client", lambda *a, **k: types.SimpleNamespace(synthesize_speech=lambda **kw: {"AudioStream": types.SimpleNamespace(read=lambda: b"audio")}))
-    with patch("builtins.open", MagicMock()):
-        channel.uploadFileToS3 = lambda *a, **k: True
-        DummyS3 = MockS3Client()
-        DummyS3.generate_presigned_url = lambda *a, **k: "https://dummy-s3-url"
-        audio, url = channel.synthesizeSpeech("hi", DummyS3, "bucket", {"AWS_ACCESS_KEY_ID": "a", "AWS_SECRET_ACCESS_KEY": "b", "AWS_REGION": "us", "S3_BUCKET_NAME": "bucket"})
-        assert audio == "response_audio.mp3"
-        assert url == "https://dummy-s3-url"
-
-def testUploadSynthesizedAudio():
-    channel = TelegramVoiceChannel(token="dummy")
-    channel.uploadFileToS3 = lambda *a, **k: True
-    DummyS3 = MockS3Client()
-    DummyS3.generate_presigned_url = lambda *a, **k: "https://dummy-s3-url"
-    audio, url = channel.uploadSynthesizedAudio("audio.mp3", DummyS3, "bucket")
-    assert audio == "audio.mp3"
-    assert url == "https://dummy-s3-url"
-
-def testUploadSynthesizedAudioFail():
-    channel = TelegramVoiceChannel(token="dummy")
-    channel.uploadFileToS3 = lambda *a, **k: False
-    DummyS3 = MockS3Client()
-    with pytest.raises(Exception):
-        channel._uploadSynthesizedAudio("audio.mp3", DummyS3, "bucket")
+    audio = channel.synthesizeSpeech("hi", {"AWS_ACCESS_KEY_ID": "a", "AWS_SECRET_ACCESS_KEY": "b", "AWS_REGION": "us", "S3_BUCKET_NAME": "bucket"})
+    assert audio == b"audio"
+
+def testSynthesizeSpeechReusesAudio(monkeypatch):
+    channel = TelegramVoiceChannel(token="dummy")
+    calls = []
+    def synthesize(**kw):
+        calls.append(kw["Text"])
+        return {"AudioStream": types.SimpleNamespace(read=lambda: b"audio-" + kw["Text"].encode())}
+    monkeypatch.setattr("boto3.client", lambda *a, **k: types.SimpleNamespace(synthesize_speech=synthesize))
+    config = {"AWS_ACCESS_KEY_ID": "a", "AWS_SECRET_ACCESS_KEY": "b", "AWS_REGION": "us"}
+    assert channel.synthesizeSpeech("hi", config) == b"audio-hi"
+    assert channel.synthesizeSpeech("hi", config) == b"audio-hi"
+    assert channel.synthesizeSpeech("bye", config) == b"audio-bye"
+    assert calls == ["hi", "bye"]
+
+def testSynthesizeAndSendResponse(monkeypatch):
+    channel = TelegramVoiceChannel(token="dummy")
+    monkeypatch.setattr(channel, "synthesizeSpeech", lambda *a, **k: b"mp3")
+    post = MagicMock()
+    monkeypatch.setattr(channel.httpSession, "post", post)
+    channel.synthesizeAndSendResponse({"chat": {"id": 5}}, "hello", {})
+    args, kwargs = post.call_args
+    assert args[0].endswith("/sendAudio")
+    assert kwargs["data"] == {"chat_id": 5}
+    assert kwargs["files"]["audio"] == ("response.mp3", b"mp3", "audio/mpeg")
 
 def testUploadAndTranscribe(monkeypatch):
     channel = TelegramVoiceChannel(token="dummy")
@@ -102,9 +140,51 @@ def testUploadAndTranscribe(monkeypatch):
     monkeypatch.setattr(channel, "startTranscriptionJob", lambda *a, **k: ("job", None))
     monkeypatch.setattr(channel, "waitForTranscription", lambda *a, **k: {"TranscriptionJob": {"TranscriptionJobStatus": "COMPLETED", "Transcript": {"TranscriptFileUri": "http://dummy"}}})
     monkeypatch.setattr(channel, "getTranscribedText", lambda *a, **k: "text")
-    result = channel.uploadAndTranscribe(None, None, {"S3_BUCKET_NAME": "bucket"}, "file.wav")
+    monkeypatch.setattr(channel, "cleanupTranscription", lambda *a, **k: None)
+    result = channel.uploadAndTranscribe(None, None, {"S3_BUCKET_NAME": "bucket"}, b"wav")
     assert result == "text"
 
+def testUploadAndTranscribeCleansUp(monkeypatch):
+    channel = TelegramVoiceChannel(token="dummy")
+    s3Client = MagicMock()
+    transcribeClient = MagicMock()
+    monkeypatch.setattr(channel, "startTranscriptionJob", lambda *a, **k: ("job", None))
+    monkeypatch.setattr(channel, "waitForTranscription", lambda *a, **k: {})
+    monkeypatch.setattr(channel, "getTranscribedText", lambda *a, **k: "text")
+    assert channel.uploadAndTranscribe(s3Client, transcribeClient, {"S3_BUCKET_NAME": "bucket"}, b"wav") == "text"
+    s3Key = s3Client.put_object.call_args.kwargs["Key"]
+    s3Client.delete_object.assert_called_once_with(Bucket="bucket", Key=s3Key)
+    transcribeClient.delete_transcription_job.assert_called_once_with(TranscriptionJobName="job")
+    # A failed transcription still removes the recording and the job.
+    def failTranscript(*a, **k):
+        raise Exception("Transcription failed.")
+    monkeypatch.setattr(channel, "getTranscribedText", failTranscript)
+    s3Client.reset_mock()
+    transcribeClient.reset_mock()
+    with pytest.raises(Exception):
+        channel.uploadAndTranscribe(s3Client, transcribeClient, {"S3_BUCKET_NAME": "bucket"}, b"wav")
+    s3Client.delete_object.assert_called_once()
+    transcribeClient.delete_transcription_job.assert_called_once_with(TranscriptionJobName="job")
+
+def testGetTranscribedText(monkeypatch):
+    channel = TelegramVoiceChannel(token="dummy")
+    body = b'{"results": {"transcripts": [{"transcript": " hello there "}], "items": []}}'
+    monkeypatch.setattr(channel.httpSession, "get", lambda url: types.SimpleNamespace(content=body))
+    status = MockTranscribeClient().get_transcription_job("job")
+    assert channel.getTranscribedText(status) == "hello there"
+    with pytest.raises(Exception):
+        channel.getTranscribedText({"TranscriptionJob": {"TranscriptionJobStatus": "FAILED"}})
+
+def testWaitForTranscription(monkeypatch):
+    channel = TelegramVoiceChannel(token="dummy")
+    assert channel.waitForTranscription(MockTranscribeClient(), "job")["TranscriptionJob"]["TranscriptionJobStatus"] == "COMPLETED"
+    class StuckTranscribeClient:
+        def get_transcription_job(self, TranscriptionJobName):
+            return {"TranscriptionJob": {"TranscriptionJobStatus": "IN_PROGRESS"}}
+    monkeypatch.setattr("telegram_voice.telegram_voice.TRANSCRIBE_TIMEOUT", 0)
+    with pytest.raises(Exception):
+        channel.waitForTranscription(StuckTranscribeClient(), "job")
+
 def testGetResponseText(monkeypatch):
     channel = TelegramVoiceChannel(token="dummy")
     # Dialogflow present
@@ -115,7 +195,8 @@ def testGetResponseText(monkeypatch):
     message = {"chat": {"id": 1}}
     resp = channel.getResponseText(message, "text", "pid", DummyHandler())
     assert resp == "ok"
-    # Dialogflow fallback
+    # Dialogflow fallback (fresh channel, so the cached "ok" is not reused)
+    channel = TelegramVoiceChannel(token="dummy")
     class DummyHandler2:
         def processRequest(self, req):
             return {"fulfillmentText": ""}
@@ -125,20 +206,53 @@ def testGetResponseText(monkeypatch):
     resp = channel.getResponseText(message, "text", None, None)
     assert resp.startswith("You said:")
 
-def testCleanupVoiceFiles(monkeypatch):
+def testGetResponseTextReusesRepeatedQuestion(monkeypatch):
     channel = TelegramVoiceChannel(token="dummy")
-    monkeypatch.setattr("os.remove", lambda *a, **k: None)
-    channel.cleanupVoiceFiles("ogg", "wav")
+    calls = []
+    def fakeDetectIntent(*a, **k):
+        calls.append(a)
+        return {"intent": {"displayName": "GetWeather"}, "parameters": {}, "fulfillmentText": "hi", "fulfillmentMessages": []}
+    monkeypatch.setattr("telegram_voice.telegram_voice.detectIntent", fakeDetectIntent)
+    class DummyHandler:
+        def processRequest(self, req):
+            return {"fulfillmentText": "Sunny"}
+    assert channel.getResponseText({"chat": {"id": 1}}, "Weather in Rome?", "pid", DummyHandler()) == "Sunny"
+    assert channel.getResponseText({"chat": {"id": 1}}, "weather in rome", "pid", DummyHandler()) == "Sunny"
+    assert len(calls) == 1
+    channel.getResponseText({"chat": {"id": 2}}, "weather in rome", "pid", DummyHandler())
+    assert len(calls) == 2
+
+def testGetResponseTextSkipsUncachedIntents(monkeypatch):
+    channel = TelegramVoiceChannel(token="dummy")
+    calls = []
+    intentName = {"value": "Small Talk"}
+    def fakeDetectIntent(*a, **k):
+        calls.append(a)
+        return {"intent": {"displayName": intentName["value"]}, "parameters": {}, "fulfillmentText": "", "fulfillmentMessages": []}
+    monkeypatch.setattr("telegram_voice.telegram_voice.detectIntent", fakeDetectIntent)
+    handler = DialogflowHandler(None, None, None, None)
+    message = {"chat": {"id": 1}}
+    # Unhandled intent: the fallback reply is not reused.
+    assert channel.getResponseText(message, "hello", "pid", handler) == UNHANDLED_TEXT
+    assert channel.getResponseText(message, "hello", "pid", handler) == UNHANDLED_TEXT
+    assert len(calls) == 2
+    # Handled but uncached intent: Dialogflow sees every utterance.
+    class ContextHandler:
+        def processRequest(self, req):
+            return {"fulfillmentText": "Sure"}
+    intentName["value"] = "BookTable"
+    channel.getResponseText(message, "yes", "pid", ContextHandler())
+    channel.getResponseText(message, "yes", "pid", ContextHandler())
+    assert len(calls) == 4
 
 @pytest.mark.asyncio
 async def testHandleVoiceMessage(monkeypatch):
     channel = TelegramVoiceChannel(token="dummy")
-    monkeypatch.setattr(channel, "downloadAndConvertVoice", AsyncMock(return_value=("ogg", "wav")))
+    monkeypatch.setattr(channel, "downloadAndConvertVoice", AsyncMock(return_value=b"wav"))
     monkeypatch.setattr(channel, "createS3Clients", lambda c: (MockS3Client(), MockTranscribeClient()))
     monkeypatch.setattr(channel, "uploadAndTranscribe", lambda *a, **k: "transcript")
     monkeypatch.setattr(channel, "getResponseText", lambda *a, **k: "hello")
     monkeypatch.setattr(channel, "synthesizeAndSendResponse", lambda *a, **k: None)
-    monkeypatch.setattr(channel, "cleanupVoiceFiles", lambda *a, **k: None)
     result = await channel.handleVoiceMessage({}, {"S3_BUCKET_NAME": "bucket"})
     assert result["status"] == 0
     # Test error case
@@ -157,3 +271,21 @@ async def testProcessWebhook(monkeypatch):
     # Non-voice message
     resp = await channel.processWebhook({"message": {"text": "hi"}}, None, {"S3_BUCKET_NAME": "bucket"}, None)
     assert resp["status"] == 0
+
+def testStartTranscriptionJobRetriesOnLimit(monkeypatch):
+    from botocore.exceptions import ClientError
+    channel = TelegramVoiceChannel(token="dummy")
+    monkeypatch.setattr("time.sleep", lambda *a: None)
+    attempts = []
+    class BusyTranscribeClient(MockTranscribeClient):
+        def start_transcription_job(self, **kwargs):
+            attempts.append(kwargs["TranscriptionJobName"])
+            if len(attempts) < 3:
+                raise ClientError({"Error": {"Code": "LimitExceededException"}}, "StartTranscriptionJob")
+    jobName, _ = channel.startTranscriptionJob(None, BusyTranscribeClient(), "bucket", "key")
+    assert len(attempts) == 3 and set(attempts) == {jobName}
+    class DeniedTranscribeClient(MockTranscribeClient):
+        def start_transcription_job(self, **kwargs):
+            raise ClientError({"Error": {"Code": "AccessDeniedException"}}, "StartTranscriptionJob")
+    with pytest.raises(ClientError):
+        channel.startTranscriptionJob(None, DeniedTranscribeClient(), "bucket", "key")
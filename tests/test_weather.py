@@ -12,58 +12,58 @@ def mockResponse(jsonData=None, statusCode=200):
     return mock
 
 def testInitLogs():
-    with patch('logging.info') as log:
+    with patch('weather.logger.info') as log:
         WeatherService('key')
         log.assert_called()
 
 def testGetCoordinatesSuccess(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse([{"lat": 1.0, "lon": 2.0}], 200))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse([{"lat": 1.0, "lon": 2.0}], 200))
     res = service.getCoordinates('city')
     assert res['lat'] == 1.0
 
 def testGetCoordinatesFail(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse([], 200))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse([], 200))
     res = service.getCoordinates('city')
     assert res is None
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse(None, 404))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse(None, 404))
     res = service.getCoordinates('city')
     assert res is None
 
 def testGetCurrentWeatherSuccess(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse({"current": {"temp": 10}}, 200))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse({"current": {"temp": 10}}, 200))
     res = service.getCurrentWeather(1.0, 2.0)
     assert res['temp'] == 10
 
 def testGetCurrentWeatherFail(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse({}, 404))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse({}, 404))
     res = service.getCurrentWeather(1.0, 2.0)
     assert res is None
 
 def testGetHourlyForecastSuccess(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse({"hourly": [1,2]}, 200))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse({"hourly": [1,2]}, 200))
     res = service.getHourlyForecast(1.0, 2.0)
     assert res == [1,2]
 
 def testGetHourlyForecastFail(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse({}, 404))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse({}, 404))
     res = service.getHourlyForecast(1.0, 2.0)
     assert res is None
 
 def testGetDailyForecastSuccess(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse({"daily": [1,2]}, 200))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse({"daily": [1,2]}, 200))
     res = service.getDailyForecast(1.0, 2.0)
     assert res == [1,2]
 
 def testGetDailyForecastFail(monkeypatch):
     service = WeatherService('key')
-    monkeypatch.setattr('requests.get', lambda *a, **k: mockResponse({}, 404))
+    monkeypatch.setattr('requests.Session.get', lambda *a, **k: mockResponse({}, 404))
     res = service.getDailyForecast(1.0, 2.0)
     assert res is None
 
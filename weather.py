@@ -3,63 +3,62 @@ import logging
 from datetime import datetime, timedelta
 import re
 
-# Configure logging.
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+logger = logging.getLogger(__name__)
 
 class WeatherService:
     def __init__(self, apiKey: str):
         self.apiKey = apiKey
-        logging.info("WeatherService initialized with provided API key.")
+        # Keep-alive pool shared by the executor threads that run the lookups; a forecast takes two calls to the same host.
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=32))
+        self.session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=32))
+        logger.info("WeatherService initialized with provided API key.")
 
     def getCoordinates(self, city: str) -> dict:
-        logging.info(f"Getting coordinates for city: {city}")
+        logger.debug("Getting coordinates for city: %s", city)
         url = f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={self.apiKey}"
-        response = requests.get(url)
+        response = self.session.get(url)
         if response.status_code == 200 and response.json():
-            logging.info(f"Coordinates for {city} retrieved successfully.")
+            logger.debug("Coordinates for %s retrieved successfully.", city)
             return response.json()[0]
         else:
-            logging.error(f"Failed to get coordinates for {city}. Status Code: {response.status_code}")
+            logger.error("Failed to get coordinates for %s. Status Code: %s", city, response.status_code)
             return None
 
     def getCurrentWeather(self, lat: float, lon: float) -> dict:
-        logging.info(f"Getting current weather for lat: {lat}, lon: {lon}")
+        logger.debug("Getting current weather for lat: %s, lon: %s", lat, lon)
         url = (f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}"
                f"&exclude=minutely,hourly,daily,alerts&units=metric&appid={self.apiKey}")
-        response = requests.get(url)
+        response = self.session.get(url)
         if response.status_code == 200:
-            logging.info("Current weather data retrieved successfully.")
+            logger.debug("Current weather data retrieved successfully.")
             return response.json().get("current", {})
         else:
-            logging.error(f"Failed to retrieve current weather. Status Code: {response.status_code}")
+            logger.error("Failed to retrieve current weather. Status Code: %s", response.status_code)
             return None
 
     def getHourlyForecast(self, lat: float, lon: float) -> list:
-        logging.info(f"Getting hourly forecast for lat: {lat}, lon: {lon}")
+        logger.debug("Getting hourly forecast for lat: %s, lon: %s", lat, lon)
         url = (f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}"
                f"&exclude=minutely,daily,current,alerts&units=metric&appid={self.apiKey}")
-        response = requests.get(url)
+        response = self.session.get(url)
         if response.status_code == 200:
-            logging.info("Hourly forecast data retrieved successfully.")
+            logger.debug("Hourly forecast data retrieved successfully.")
             return response.json().get("hourly", [])
         else:
-            logging.error(f"Failed to retrieve hourly forecast. Status Code: {response.status_code}")
+            logger.error("Failed to retrieve hourly forecast. Status Code: %s", response.status_code)
             return None
 
     def getDailyForecast(self, lat: float, lon: float) -> list:
-        logging.info(f"Getting daily forecast for lat: {lat}, lon: {lon}")
+        logger.debug("Getting daily forecast for lat: %s, lon: %s", lat, lon)
         url = (f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}"
                f"&exclude=minutely,hourly,current,alerts&units=metric&appid={self.apiKey}")
-        response = requests.get(url)
+        response = self.session.get(url)
         if response.status_code == 200:
-            logging.info("Daily forecast data retrieved successfully.")
+            logger.debug("Daily forecast data retrieved successfully.")
             return response.json().get("daily", [])
         else:
-            logging.error(f"Failed to retrieve daily forecast. Status Code: {response.status_code}")
+            logger.error("Failed to retrieve daily forecast. Status Code: %s", response.status_code)
             return None
 
     def formatUnixTime(self, timestamp: int) -> str: